@@ -6,3 +6,6 @@ class MorphOperationType(Enum):
     EROSION = "Erosion"
     OPENING = "Opening"
     CLOSING = "Closing"
+    RECONSTRUCTION = "Reconstruction by Dilation"
+    HOLE_FILL = "Hole Filling"
+    CLEAR_BORDER = "Border Clearing"
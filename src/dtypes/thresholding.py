@@ -14,3 +14,6 @@ class ThresholdingType(Enum):
     ADAPTIVE_MEAN = "Adaptive Mean Thresholding"
     ADAPTIVE_GAUSSIAN = "Adaptive Gaussian Thresholding"
     OTSU = "Otsu's Method"
+    MULTI_OTSU = "Multi-level Otsu's Method"
+    SAUVOLA = "Sauvola Thresholding"
+    NIBLACK = "Niblack Thresholding"
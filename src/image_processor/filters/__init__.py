@@ -1,6 +1,7 @@
 from .interface import IFilter
 from .builder import FilterBuilder, FilterType
 from .core import (
+    LinearFilter,
     AverageFilter,
     MedianFilter,
     GaussianFilter,
@@ -8,12 +9,14 @@ from .core import (
     LaplacianFilter,
     UnsharpMaskingFilter,
     HighBoostFilter,
+    FilterChain,
 )
 
 __all__ = [
     "IFilter",
     "FilterBuilder",
     "FilterType",
+    "LinearFilter",
     "AverageFilter",
     "MedianFilter",
     "GaussianFilter",
@@ -21,4 +24,5 @@ __all__ = [
     "LaplacianFilter",
     "UnsharpMaskingFilter",
     "HighBoostFilter",
+    "FilterChain",
 ]
@@ -7,10 +7,11 @@ from .core import (
     LaplacianFilter,
     UnsharpMaskingFilter,
     HighBoostFilter,
+    FilterChain,
 )
 from src.dtypes import FilterType
 
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
 
 class FilterBuilder:
@@ -47,3 +48,16 @@ class FilterBuilder:
             return HighBoostFilter(sigma, A)
 
         raise ValueError("Invalid filter type")
+
+    @staticmethod
+    def BuildChain(stages: List[Tuple[FilterType, Dict[str, Any]]]) -> FilterChain:
+        """
+        Builds a fused chain of filters, merging consecutive linear filters into one convolution.
+        Args:
+            stages (List[Tuple[FilterType, Dict[str, Any]]]): The (type, kwargs) of each filter, in order.
+        Returns:
+            FilterChain: The fused filter chain.
+        """
+        return FilterChain(
+            [FilterBuilder.Build(type, **kwargs) for type, kwargs in stages]
+        )
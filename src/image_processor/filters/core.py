@@ -1,35 +1,115 @@
 from .interface import IFilter
-from src.utils import CVMath
+from src.utils import BufferPool, CVMath, KernelCache, KernelGenerator, MedianEngine
 
 import numpy as np
+from typing import List, Optional
 
 
-class AverageFilter(IFilter):
+class LinearFilter(IFilter):
+    def __init__(self, kernel: np.ndarray):
+        """Constructor for LinearFilter class, the base of filters defined by a single convolution kernel
+        Args:
+            kernel (np.ndarray, 2D): The convolution kernel
+        """
+        self.kernel = kernel
+        self.factors = KernelCache.Derive("separable", kernel, CVMath.SeparateKernel)
+
+    def Filter(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """Apply the kernel to an image
+        Args:
+            image (np.ndarray, 2D): The input image to be filtered
+            out (np.ndarray, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+        Returns:
+            image (np.ndarray, 2D): The filtered image
+        """
+        return self.Convolve(image, out, pool)
+
+    def Convolve(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """Convolve an image with the kernel, as two 1D passes when the kernel is separable and in the
+        frequency domain when the kernel is large. Subclasses with a faster equivalent override this,
+        so Filter and FilterSaturated both use it. uint8 results are rounded to the nearest level.
+        Args:
+            image (np.ndarray, 2D): The input image to be filtered
+            out (np.ndarray, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+        Returns:
+            image (np.ndarray, 2D): The filtered image
+        """
+        separable = self.factors is not None
+        if separable and not CVMath.UseFFT(image, self.kernel, separable):
+            return CVMath.SeparableConvolve(image, *self.factors, out=out)
+        return CVMath.Convolve(image, self.kernel, out=out)
+
+    def FilterSaturated(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """Apply the kernel and saturate the result to uint8 in the same pass. uint8 images are rounded
+        to the nearest level, other images are clipped and truncated.
+        Args:
+            image (np.ndarray, 2D): The input image to be filtered
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw the float32 intermediate from
+        Returns:
+            image (np.ndarray, 2D, uint8): The filtered image
+        """
+        if image.dtype == np.uint8:
+            return self.Convolve(image, out, pool)
+
+        filtered = BufferPool.Scratch(pool, image.shape, np.float32, "saturate")
+        self.Convolve(image.astype(np.float32, copy=False), filtered, pool)
+        np.clip(filtered, 0, 255, out=filtered)
+        if out is None:
+            return filtered.astype(np.uint8)
+        np.copyto(out, filtered, casting="unsafe")
+        return out
+
+
+class AverageFilter(LinearFilter):
     def __init__(self, kernel_size: int = 5):
         """Constructor for AverageFilter class
         Args:
             kernel_size (int, optional): Size of the average filter kernel. Defaults to 5.
         """
         self.kernel_size = kernel_size
-        self.kernel = self.GenerateKernel()
+        super().__init__(self.GenerateKernel())
 
     def GenerateKernel(self) -> np.ndarray:
         """Generates the average filter kernel
         Returns:
             kernel (np.ndarray, 2D): The average filter kernel
         """
-        kernel = np.ones((self.kernel_size, self.kernel_size), dtype=np.float32)
-        kernel /= np.sum(kernel)
-        return kernel
+        return KernelGenerator.GetBoxKernel(self.kernel_size, np.float32)
 
-    def Filter(self, image: np.ndarray) -> np.ndarray:
-        """Apply average filter to an image using convolution
+    def Convolve(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """Apply average filter to an image using a summed-area table, at the same cost for any kernel size
         Args:
             image (np.ndarray, 2D): The input image to be filtered
+            out (np.ndarray, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
             image (np.ndarray, 2D): The filtered image
         """
-        return CVMath.Convolve(image, self.kernel)
+        scratch = BufferPool.Scratch(pool, image.shape, np.float64, "box_sum")
+        return CVMath.BoxMean(image, self.kernel_size, out, scratch)
 
 
 class MedianFilter(IFilter):
@@ -38,105 +118,95 @@ class MedianFilter(IFilter):
         Args:
             kernel_size (int, optional): Size of the median filter kernel. Defaults to 5.
         """
+        if kernel_size % 2 == 0:
+            kernel_size += 1
         self.kernel_size = kernel_size
 
-    def Filter(self, image: np.ndarray) -> np.ndarray:
-        """Apply median filter to an image
+    def Filter(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """Apply median filter to an image, replicating edge pixels at the borders
         Args:
             image (np.ndarray, 2D): The input image to be filtered
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
             image (np.ndarray, 2D): The filtered image
         """
-        k = self.kernel_size
-        h, w = image.shape
-        output = np.zeros_like(image, dtype=np.float32)
+        if image.dtype != np.uint8:
+            clipped = BufferPool.Scratch(pool, image.shape, np.uint8, "median_input")
+            np.copyto(clipped, np.clip(image, 0, 255), casting="unsafe")
+            image = clipped
+        return MedianEngine.Median(image, self.kernel_size, out)
 
-        for i in range(h - k + 1):
-            for j in range(w - k + 1):
-                region = image[i : i + k, j : j + k]
-                output[i + k // 2, j + k // 2] = np.median(region)
 
-        return np.clip(output, 0, 255).astype(np.uint8)
-
-
-class GaussianFilter(IFilter):
-    def __init__(self, sigma: float = 1.0, kernel_size: int = 5):
+class GaussianFilter(LinearFilter):
+    def __init__(self, sigma: float = 1.0, kernel_size: Optional[int] = 5):
         """Constructor for GaussianFilter class
         Args:
             sigma (float, optional): Standard deviation of the Gaussian kernel. Defaults to 1.0.
-            kernel_size (int, optional): Size of the Gaussian kernel. Defaults to 5.
+            kernel_size (int, optional): Size of the Gaussian kernel, derived from sigma (6 sigma + 1) if None. Defaults to 5.
         """
         self.sigma = sigma
+        if kernel_size is None:
+            kernel_size = 2 * int(np.ceil(3.0 * sigma)) + 1
         if kernel_size % 2 == 0:
             kernel_size += 1
         self.kernel_size = kernel_size
-        self.kernel = self.GenerateKernel()
+        super().__init__(self.GenerateKernel())
 
     def GenerateKernel(self) -> np.ndarray:
         """Generates the Gaussian kernel
         Returns:
             kernel (np.ndarray, 2D): The Gaussian kernel
         """
-        ax = np.arange(-self.kernel_size // 2 + 1.0, self.kernel_size // 2 + 1.0)
-        xx, yy = np.meshgrid(ax, ax)
-        kernel = np.exp(-(xx**2 + yy**2) / (2.0 * self.sigma**2))
-        kernel /= np.sum(kernel)
-        return kernel
-
-    def Filter(self, image: np.ndarray) -> np.ndarray:
-        """Apply Gaussian blur to an image using convolution
-        Args:
-            image (np.ndarray, 2D): The input image to be filtered
-        Returns:
-            image (np.ndarray, 2D): The filtered image
-        """
-        return CVMath.Convolve(image, self.kernel)
+        return KernelGenerator.GetGaussianKernel(self.sigma, self.kernel_size)
 
 
-class SobelFilter(IFilter):
+class SobelFilter(LinearFilter):
     def __init__(self, axis: int = 0):
         """Constructor for SobelFilter class
         Args:
             axis (int, optional): Axis along which to apply the filter (0 for X-axis, 1 for Y-axis). Defaults to 0.
         """
         self.axis = axis
-        if self.axis == 0:
-            self.kernel = np.array(
-                [[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=np.float32
-            )
-        elif self.axis == 1:
-            self.kernel = np.array(
-                [[-1, -2, -1], [0, 0, 0], [1, 2, 1]], dtype=np.float32
-            )
-        else:
+        if self.axis not in (0, 1):
             raise ValueError("Axis must be '0' or '1'")
+        super().__init__(self.GenerateKernel())
 
-    def Filter(self, image: np.ndarray) -> np.ndarray:
-        """Apply Sobel filter to an image using convolution
-        Args:
-            image (np.ndarray, 2D): The input image to be filtered
+    def GenerateKernel(self) -> np.ndarray:
+        """Generates the Sobel kernel for the filter axis
         Returns:
-            image (np.ndarray, 2D): The filtered image
+            kernel (np.ndarray, 2D): The Sobel kernel
         """
-        return CVMath.Convolve(image, self.kernel)
 
+        def build() -> np.ndarray:
+            kernel = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=np.float32)
+            return kernel if self.axis == 0 else np.ascontiguousarray(kernel.T)
 
-class LaplacianFilter(IFilter):
+        return KernelCache.Get(("sobel", 3, self.axis, "float32"), build)
+
+
+class LaplacianFilter(LinearFilter):
     def __init__(self):
         """Constructor for LaplacianFilter class"""
-        self.kernel = np.array([[0, -1, 0], [-1, 4, -1], [0, -1, 0]], dtype=np.float32)
+        super().__init__(self.GenerateKernel())
 
-    def Filter(self, image: np.ndarray) -> np.ndarray:
-        """Apply Laplacian filter to an image using convolution
-        Args:
-            image (np.ndarray, 2D): The input image to be filtered
+    def GenerateKernel(self) -> np.ndarray:
+        """Generates the Laplacian kernel
         Returns:
-            image (np.ndarray, 2D): The filtered image
+            kernel (np.ndarray, 2D): The Laplacian kernel
         """
-        return CVMath.Convolve(image, self.kernel)
+        return KernelCache.Get(
+            ("laplacian", 3, None, "float32"),
+            lambda: np.array([[0, -1, 0], [-1, 4, -1], [0, -1, 0]], dtype=np.float32),
+        )
 
 
-class UnsharpMaskingFilter(IFilter):
+class UnsharpMaskingFilter(LinearFilter):
     def __init__(self, sigma: float = 1.0, strength: float = 1.0):
         """Constructor for UnsharpMaskingFilter class
         Args:
@@ -146,21 +216,43 @@ class UnsharpMaskingFilter(IFilter):
         self.sigma = sigma
         self.strength = strength
         self.gaussian = GaussianFilter(sigma, kernel_size=5)
+        super().__init__(self.GenerateKernel())
+
+    def GenerateKernel(self) -> np.ndarray:
+        """Generates the fused USM kernel: image + strength * (image - blurred)
+        Returns:
+            kernel (np.ndarray, 2D): The unsharp masking kernel
+        """
 
-    def Filter(self, image: np.ndarray) -> np.ndarray:
-        """Apply Unsharp Masking (USM) filter to an image
+        def build() -> np.ndarray:
+            kernel = -self.strength * self.gaussian.kernel
+            center = self.gaussian.kernel_size // 2
+            kernel[center, center] += 1.0 + self.strength
+            return kernel.astype(np.float32)
+
+        key = ("unsharp", self.gaussian.kernel_size, (self.sigma, self.strength), "float32")
+        return KernelCache.Get(key, build)
+
+    def Filter(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """Apply Unsharp Masking (USM) filter to an image in a single convolution pass. uint8 results are rounded to the
+        nearest level rather than truncated, so they can differ by one gray level from blurring,
+        subtracting and truncating stage by stage.
         Args:
             image (np.ndarray, 2D): The input image to be filtered
+            out (np.ndarray, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
             image (np.ndarray, 2D): The filtered image
         """
-        blurred = self.gaussian.Filter(image)
-        mask = image.astype(np.float32) - blurred.astype(np.float32)
-        sharpened = image.astype(np.float32) + self.strength * mask
-        return np.clip(sharpened, 0, 255).astype(np.uint8)
+        return self.FilterSaturated(image, out, pool)
 
 
-class HighBoostFilter(IFilter):
+class HighBoostFilter(LinearFilter):
     def __init__(self, sigma: float = 1.0, A: float = 1.0):
         """Constructor for HighBoostFilter class
         Args:
@@ -170,14 +262,110 @@ class HighBoostFilter(IFilter):
         self.sigma = sigma
         self.A = A
         self.gaussian = GaussianFilter(sigma=sigma)
+        super().__init__(self.GenerateKernel())
 
-    def Filter(self, image: np.ndarray) -> np.ndarray:
-        """Apply high-boost filtering to an image
+    def GenerateKernel(self) -> np.ndarray:
+        """Generates the fused high-boost kernel: A * image - blurred
+        Returns:
+            kernel (np.ndarray, 2D): The high-boost kernel
+        """
+
+        def build() -> np.ndarray:
+            kernel = -self.gaussian.kernel
+            center = self.gaussian.kernel_size // 2
+            kernel[center, center] += self.A
+            return kernel.astype(np.float32)
+
+        key = ("high_boost", self.gaussian.kernel_size, (self.sigma, self.A), "float32")
+        return KernelCache.Get(key, build)
+
+    def Filter(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """Apply high-boost filtering to an image in a single convolution pass. uint8 results are rounded to the
+        nearest level rather than truncated, so they can differ by one gray level from blurring,
+        subtracting and truncating stage by stage.
         Args:
             image (np.ndarray, 2D): The input image to be filtered
+            out (np.ndarray, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
             image (np.ndarray, 2D): The filtered image
         """
-        blurred = self.gaussian.Filter(image)
-        boosted = self.A * image.astype(np.float32) - blurred.astype(np.float32)
-        return np.clip(boosted, 0, 255).astype(np.uint8)
+        return self.FilterSaturated(image, out, pool)
+
+
+class FilterChain(IFilter):
+    def __init__(self, filters: List[IFilter]):
+        """Constructor for FilterChain class. Consecutive linear filters are merged into a single
+        kernel, so each run of linear stages costs one convolution pass and one clip at the end.
+        Non-linear filters (e.g. median) are applied as separate stages.
+        Note that fused stages keep full precision between the merged filters, whereas applying
+        them one by one rounds and saturates the image after every stage.
+        Args:
+            filters (List[IFilter]): The filters to be applied, in order
+        """
+        self.filters = list(filters)
+        self.stages = self.Fuse(self.filters)
+
+    @staticmethod
+    def Fuse(filters: List[IFilter]) -> List[IFilter]:
+        """Merges every run of consecutive linear filters into one LinearFilter
+        Args:
+            filters (List[IFilter]): The filters to be fused
+        Returns:
+            stages (List[IFilter]): The fused filter stages
+        """
+        stages, run = [], []
+        for flt in filters + [None]:
+            if isinstance(flt, LinearFilter):
+                run.append(flt)
+                continue
+
+            if len(run) == 1:
+                stages.append(run[0])
+            elif len(run) > 1:
+                kernel = run[0].kernel
+                for linear in run[1:]:
+                    kernel = CVMath.ComposeKernels(kernel, linear.kernel)
+                stages.append(LinearFilter(kernel.astype(np.float32)))
+            run = []
+
+            if flt is not None:
+                stages.append(flt)
+
+        return stages
+
+    def Filter(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """Apply every fused stage of the chain to an image. With a pool, intermediate stages
+        alternate between two pooled buffers and only the last stage writes into out.
+        Args:
+            image (np.ndarray, 2D): The input image to be filtered
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw the intermediate buffers from
+        Returns:
+            image (np.ndarray, 2D): The filtered image
+        """
+        last = len(self.stages) - 1
+        for i, stage in enumerate(self.stages):
+            if i == last:
+                target = out
+            elif pool is not None:
+                target = pool.Get(image.shape, np.uint8, ("chain", i % 2))
+            else:
+                target = None
+
+            image = (
+                stage.FilterSaturated(image, target, pool)
+                if isinstance(stage, LinearFilter)
+                else stage.Filter(image, target, pool)
+            )
+        return image
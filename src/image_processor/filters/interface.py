@@ -1,8 +1,16 @@
 import numpy as np
 from abc import ABC, abstractmethod
+from typing import Optional
+
+from src.utils import BufferPool
 
 
 class IFilter(ABC):
     @abstractmethod
-    def Filter(self, image: np.ndarray) -> np.ndarray:
+    def Filter(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
         raise NotImplementedError
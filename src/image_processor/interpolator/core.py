@@ -1,6 +1,37 @@
 import cv2
 import numpy as np
+from typing import Optional
 from .interface import IInterpolator
+from src.utils import BufferPool
+
+
+class InterpolationHelper:
+    @staticmethod
+    def Resize(
+        image: np.ndarray,
+        size: tuple[int, int],
+        interpolation: int,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Resizes an image with OpenCV, writing into out when given.
+        Args:
+            image (np.ndarray): Input image.
+            size (tuple[int, int]): Target size (width, height).
+            interpolation (int): OpenCV interpolation method.
+            out (np.ndarray, optional): Buffer of shape (height, width) to write the result into.
+        Returns:
+            np.ndarray: Resized image.
+        """
+        if out is not None and out.flags.c_contiguous and out.dtype == image.dtype:
+            if out.shape[:2] != (size[1], size[0]):
+                raise ValueError(
+                    f"Output buffer shape {out.shape} does not match the target size {size}"
+                )
+            resized = cv2.resize(image, size, dst=out, interpolation=interpolation)
+        else:
+            resized = cv2.resize(image, size, interpolation=interpolation)
+        return BufferPool.Write(resized, out)
 
 
 class Upscaler(IInterpolator):
@@ -16,17 +47,24 @@ class Upscaler(IInterpolator):
         self.scale_factor = scale_factor
         self.interpolation = interpolation
 
-    def Interpolate(self, image: np.ndarray) -> np.ndarray:
+    def Interpolate(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
         """
         Upscales the image by a given scale factor.
         Args:
             image (np.ndarray): Input image.
+            out (np.ndarray, optional): Buffer of the output size to write the result into.
+            pool (BufferPool, optional): Pool to draw scratch buffers from.
         Returns:
             np.ndarray: Upscaled image.
         """
         h, w = image.shape[:2]
         new_size = (int(w * self.scale_factor), int(h * self.scale_factor))
-        return cv2.resize(image, new_size, interpolation=self.interpolation)
+        return InterpolationHelper.Resize(image, new_size, self.interpolation, out)
 
 
 class Downscaler(IInterpolator):
@@ -42,17 +80,24 @@ class Downscaler(IInterpolator):
         self.scale_factor = scale_factor
         self.interpolation = interpolation
 
-    def Interpolate(self, image: np.ndarray) -> np.ndarray:
+    def Interpolate(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
         """
         Downscales the image by a given scale factor.
         Args:
             image (np.ndarray): Input image.
+            out (np.ndarray, optional): Buffer of the output size to write the result into.
+            pool (BufferPool, optional): Pool to draw scratch buffers from.
         Returns:
             np.ndarray: Downscaled image.
         """
         h, w = image.shape[:2]
         new_size = (int(w * self.scale_factor), int(h * self.scale_factor))
-        return cv2.resize(image, new_size, interpolation=self.interpolation)
+        return InterpolationHelper.Resize(image, new_size, self.interpolation, out)
 
 
 class Resizer(IInterpolator):
@@ -68,12 +113,19 @@ class Resizer(IInterpolator):
         self.target_size = target_size
         self.interpolation = interpolation
 
-    def Interpolate(self, image: np.ndarray) -> np.ndarray:
+    def Interpolate(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
         """
         Resizes the image to a target size.
         Args:
             image (np.ndarray): Input image.
+            out (np.ndarray, optional): Buffer of the output size to write the result into.
+            pool (BufferPool, optional): Pool to draw scratch buffers from.
         Returns:
             np.ndarray: Resized image.
         """
-        return cv2.resize(image, self.target_size, interpolation=self.interpolation)
+        return InterpolationHelper.Resize(image, self.target_size, self.interpolation, out)
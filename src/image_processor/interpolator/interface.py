@@ -1,13 +1,23 @@
 import numpy as np
 from abc import ABC, abstractmethod
+from typing import Optional
+
+from src.utils import BufferPool
 
 class IInterpolator(ABC):
     @abstractmethod
-    def Interpolate(self, image: np.ndarray) -> np.ndarray:
+    def Interpolate(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
         """
         Abstract interpolation method to be implemented by all interpolation operations.
         Args:
             image (np.ndarray): Input image to be interpolated.
+            out (np.ndarray, optional): Buffer of the output size to write the result into.
+            pool (BufferPool, optional): Pool to draw scratch buffers from.
         Returns:
             np.ndarray: Interpolated (resized) output image.
         """
@@ -5,7 +5,11 @@ from .core import (
     Eroder,
     Opener,
     Closer,
+    Reconstructor,
+    HoleFiller,
+    BorderClearer,
 )
+from .packed import PackedBinaryImage
 
 __all__ = [
     "IMorphOperation",
@@ -15,4 +19,8 @@ __all__ = [
     "Eroder",
     "Opener",
     "Closer",
+    "Reconstructor",
+    "HoleFiller",
+    "BorderClearer",
+    "PackedBinaryImage",
 ]
@@ -1,6 +1,14 @@
 
 from .interface import IMorphOperation
-from .core import Dilator, Eroder, Opener, Closer
+from .core import (
+    Dilator,
+    Eroder,
+    Opener,
+    Closer,
+    Reconstructor,
+    HoleFiller,
+    BorderClearer,
+)
 from src.dtypes import MorphOperationType
 
 from typing import Any, Dict
@@ -23,4 +31,17 @@ class MorphOperationBuilder:
         if type == MorphOperationType.CLOSING:
             return Closer(kernel)
 
+        if type == MorphOperationType.RECONSTRUCTION:
+            marker = kwargs.get("marker", None)
+            connectivity = kwargs.get("connectivity", 8)
+            return Reconstructor(kernel, marker, connectivity)
+
+        if type == MorphOperationType.HOLE_FILL:
+            connectivity = kwargs.get("connectivity", 4)
+            return HoleFiller(connectivity)
+
+        if type == MorphOperationType.CLEAR_BORDER:
+            connectivity = kwargs.get("connectivity", 8)
+            return BorderClearer(connectivity)
+
         raise ValueError("Invalid morphological operation type")
@@ -1,6 +1,351 @@
 from .interface import IMorphOperation
+from .packed import PackedBinaryImage
+from src.utils import BufferPool, KernelCache, MorphKernelGenerator
 
+import cv2
 import numpy as np
+from typing import Callable, Optional, Tuple, Union
+
+
+class MorphHelper:
+    # Rough cost of one running max/min pass, in whole-image operations
+    RUN_PASS_COST = 4
+
+    @staticmethod
+    def Shape(kernel: np.ndarray) -> Tuple:
+        """
+        Chooses how to apply a structuring element (the 1 entries of a kernel)
+        Args:
+            kernel (np.ndarray, 2D): The kernel
+        Returns:
+            shape (Tuple): ("rects", rects) to combine running max/min passes over the rectangles
+            of MorphKernelGenerator.Decompose, or ("offsets", ys, xs) to combine one shifted
+            image per 1 entry, whichever takes fewer whole-image operations
+        """
+        ys, xs = np.nonzero(kernel == 1)
+        if ys.size == 0:
+            raise ValueError("Kernel must contain at least one 1")
+
+        rects = MorphKernelGenerator.Decompose(kernel)
+        cost = len(rects) - 1 + sum(
+            MorphHelper.RUN_PASS_COST * ((h > 1) + (w > 1)) for _, _, h, w in rects
+        )
+        if cost < ys.size:
+            return ("rects", rects)
+        return ("offsets", ys, xs)
+
+    @staticmethod
+    def Pad(
+        image: np.ndarray, kernel_shape: Tuple[int, int], pool: Optional[BufferPool] = None
+    ) -> np.ndarray:
+        """
+        Zero-pads an image by kH // 2 rows and kW // 2 columns on every side, so window (i, j)
+        of the kernel starts at padded[i, j]
+        Args:
+            image (np.ndarray, 2D): The input image
+            kernel_shape (Tuple[int, int]): The kernel (height, width)
+            pool (BufferPool, optional): Pool to draw the padded buffer from
+        Returns:
+            padded (np.ndarray, 2D): The padded image
+        """
+        padH, padW = kernel_shape[0] // 2, kernel_shape[1] // 2
+        h, w = image.shape
+        padded = BufferPool.Scratch(
+            pool, (h + 2 * padH, w + 2 * padW), image.dtype, "morph_padded"
+        )
+        padded[:padH] = 0
+        padded[padH + h :] = 0
+        padded[padH : padH + h, :padW] = 0
+        padded[padH : padH + h, padW + w :] = 0
+        padded[padH : padH + h, padW : padW + w] = image
+        return padded
+
+    @staticmethod
+    def RunningExtreme(
+        image: np.ndarray, length: int, axis: int, op: np.ufunc
+    ) -> np.ndarray:
+        """
+        Computes the maximum or minimum of every run of length consecutive values along an axis
+        with the van Herk/Gil-Werman algorithm: the axis is cut into blocks of the run length,
+        prefix and suffix extremes are accumulated within each block and every run is the
+        extreme of one suffix and one prefix, three comparisons per value for any length.
+        Args:
+            image (np.ndarray, 2D): The input image
+            length (int): The run length
+            axis (int): The axis along which the runs are taken
+            op (np.ufunc): np.maximum or np.minimum
+        Returns:
+            extremes (np.ndarray, 2D): The run extremes, shorter by length - 1 along the axis
+        """
+        if length == 1:
+            return image
+
+        values = np.moveaxis(image, axis, 0)
+        n, rest = values.shape[0], values.shape[1:]
+        blocks = -(-n // length)
+        info = (
+            np.iinfo(image.dtype)
+            if np.issubdtype(image.dtype, np.integer)
+            else np.finfo(image.dtype)
+        )
+        identity = info.min if op is np.maximum else info.max
+
+        padded = np.empty((blocks * length,) + rest, dtype=image.dtype)
+        padded[:n] = values
+        padded[n:] = identity
+        padded = padded.reshape((blocks, length) + rest)
+
+        # One whole-slice operation per position within the blocks, the ufunc
+        # accumulate equivalent is not vectorized along the non-contiguous axis
+        prefix, suffix = np.empty_like(padded), np.empty_like(padded)
+        prefix[:, 0], suffix[:, -1] = padded[:, 0], padded[:, -1]
+        for t in range(1, length):
+            op(prefix[:, t - 1], padded[:, t], out=prefix[:, t])
+            u = length - 1 - t
+            op(suffix[:, u + 1], padded[:, u], out=suffix[:, u])
+        prefix = prefix.reshape((-1,) + rest)
+        suffix = suffix.reshape((-1,) + rest)
+
+        m = n - length + 1
+        extremes = op(suffix[:m], prefix[length - 1 : length - 1 + m])
+        return np.moveaxis(extremes, 0, axis)
+
+    @staticmethod
+    def Extreme(
+        padded: np.ndarray,
+        shape: Tuple,
+        op: np.ufunc,
+        out: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Takes the maximum or minimum over the structuring element around every pixel of a
+        padded image (see Pad). Each rectangle of the decomposition costs two running passes,
+        rows then columns, and the rectangles are combined pixel-wise.
+        Args:
+            padded (np.ndarray, 2D): The zero-padded image
+            shape (Tuple): The structuring element, see Shape
+            op (np.ufunc): np.maximum or np.minimum
+            out (np.ndarray, 2D): Buffer of the unpadded image size to write the result into
+        Returns:
+            image (np.ndarray, 2D): out holding the result
+        """
+        h, w = out.shape
+        result = None
+        if shape[0] == "rects":
+            for y0, x0, kh, kw in shape[1]:
+                region = padded[y0 : y0 + h + kh - 1, x0 : x0 + w + kw - 1]
+                region = MorphHelper.RunningExtreme(region, kh, 0, op)
+                region = MorphHelper.RunningExtreme(region, kw, 1, op)
+                result = region.copy() if result is None else op(result, region, out=result)
+        else:
+            _, ys, xs = shape
+            result = padded[ys[0] : ys[0] + h, xs[0] : xs[0] + w].copy()
+            for y, x in zip(ys[1:], xs[1:]):
+                op(result, padded[y : y + h, x : x + w], out=result)
+
+        np.copyto(out, result, casting="unsafe")
+        return out
+
+    @staticmethod
+    def Apply(
+        image: np.ndarray,
+        kernel: np.ndarray,
+        op: np.ufunc,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """
+        Takes the maximum (dilation) or minimum (erosion) of the zero-padded image over the
+        1 entries of the kernel around every pixel
+        Args:
+            image (np.ndarray, 2D): The input image
+            kernel (np.ndarray, 2D): The kernel, only its 1 entries belong to the structuring element
+            op (np.ufunc): np.maximum or np.minimum
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+        Returns:
+            image (np.ndarray, 2D, uint8): The result
+        """
+        shape = KernelCache.Derive("morph_shape", kernel, MorphHelper.Shape)
+        padded = MorphHelper.Pad(image, kernel.shape, pool)
+        if out is None:
+            out = np.empty(image.shape, dtype=np.uint8)
+        return MorphHelper.Extreme(padded, shape, op, out)
+
+    @staticmethod
+    def ApplyFused(
+        image: np.ndarray,
+        kernel: np.ndarray,
+        first: np.ufunc,
+        second: np.ufunc,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """
+        Applies two operations with the same kernel in a row (opening or closing) on a single
+        padded buffer: the first result is written back into the interior of the buffer, whose
+        zero border is still in place for the second operation
+        Args:
+            image (np.ndarray, 2D): The input image
+            kernel (np.ndarray, 2D): The kernel, only its 1 entries belong to the structuring element
+            first (np.ufunc): The first operation, np.maximum or np.minimum
+            second (np.ufunc): The second operation, np.maximum or np.minimum
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+        Returns:
+            image (np.ndarray, 2D, uint8): The result
+        """
+        shape = KernelCache.Derive("morph_shape", kernel, MorphHelper.Shape)
+        padded = MorphHelper.Pad(image, kernel.shape, pool)
+        h, w = image.shape
+        padH, padW = kernel.shape[0] // 2, kernel.shape[1] // 2
+
+        # Intermediate results are uint8, as between two separate operations
+        middle = BufferPool.Scratch(pool, image.shape, np.uint8, "morph")
+        MorphHelper.Extreme(padded, shape, first, middle)
+        padded[padH : padH + h, padW : padW + w] = middle
+
+        if out is None:
+            out = np.empty(image.shape, dtype=np.uint8)
+        return MorphHelper.Extreme(padded, shape, second, out)
+
+    @staticmethod
+    def Connectivity(connectivity: int) -> np.ndarray:
+        """
+        Returns the 3x3 neighborhood kernel of a pixel connectivity
+        Args:
+            connectivity (int): 4 or 8
+        Returns:
+            kernel (np.ndarray, 2D): The cross (4) or square (8) kernel
+        """
+        if connectivity == 4:
+            return MorphKernelGenerator.GetCrossKernel(3)
+        if connectivity == 8:
+            return MorphKernelGenerator.GetSquareKernel(3)
+        raise ValueError("Connectivity must be 4 or 8")
+
+    @staticmethod
+    def Reconstruct(
+        marker: np.ndarray, mask: np.ndarray, kernel: np.ndarray
+    ) -> np.ndarray:
+        """
+        Morphological reconstruction by dilation of a marker under a mask (Vincent's FIFO
+        algorithm): values spread from every pixel in the queue to its neighbors, never above
+        the mask, and only pixels that change are queued again, so every pixel is handled a
+        bounded number of times instead of dilating the whole image until it is stable.
+        The queue is processed in waves, each wave as a handful of array operations.
+        Works on binary and grayscale images; binary images with a 4 or 8 connectivity kernel
+        take a single connected component labelling instead.
+        Args:
+            marker (np.ndarray, 2D): The marker (seed) image
+            mask (np.ndarray, 2D): The mask image, same shape
+            kernel (np.ndarray, 2D): The neighborhood, its 1 entries around the center
+        Returns:
+            image (np.ndarray, 2D): The reconstruction, same dtype as the mask
+        """
+        if marker.shape != mask.shape:
+            raise ValueError("Marker and mask must have the same shape")
+
+        h, w = mask.shape
+        result = np.minimum(marker, mask).astype(mask.dtype, copy=False)
+        binary = MorphHelper.BinaryReconstruct(result, mask, kernel)
+        if binary is not None:
+            return binary
+        flat, limit = result.ravel(), mask.ravel()
+
+        cy, cx = kernel.shape[0] // 2, kernel.shape[1] // 2
+        ys, xs = np.nonzero(kernel == 1)
+        offsets = [(cy - y, cx - x) for y, x in zip(ys, xs) if (y, x) != (cy, cx)]
+
+        # Within one offset the targets are distinct (the queue is), so they are written
+        # directly; a dense flag array keeps a pixel raised by several offsets queued once
+        queued = np.zeros(flat.size, dtype=bool)
+        queue = np.flatnonzero(flat)
+        while queue.size:
+            qy, qx = np.divmod(queue, w)
+            values = flat[queue]
+            targets = []
+            for dy, dx in offsets:
+                ny, nx = qy + dy, qx + dx
+                inside = (ny >= 0) & (ny < h) & (nx >= 0) & (nx < w)
+                index = ny[inside] * w + nx[inside]
+                value = np.minimum(values[inside], limit[index])
+                grows = value > flat[index]
+                index = index[grows]
+                flat[index] = value[grows]
+                index = index[~queued[index]]
+                queued[index] = True
+                targets.append(index)
+
+            queue = np.concatenate(targets)
+            queued[queue] = False
+        return result
+
+    @staticmethod
+    def BinaryReconstruct(
+        seed: np.ndarray, mask: np.ndarray, kernel: np.ndarray
+    ) -> Optional[np.ndarray]:
+        """
+        Reconstruction of a two-level mask (0 and one other value) from a seed under it, when
+        the kernel is a 4 or 8 connectivity: the mask components holding a seed pixel
+        Args:
+            seed (np.ndarray, 2D): The marker, already clipped to the mask
+            mask (np.ndarray, 2D): The mask image
+            kernel (np.ndarray, 2D): The neighborhood
+        Returns:
+            image (np.ndarray | None, 2D): The reconstruction, None if the shortcut does not apply
+        """
+        if np.array_equal(kernel, MorphHelper.Connectivity(4)):
+            connectivity = 4
+        elif np.array_equal(kernel, MorphHelper.Connectivity(8)):
+            connectivity = 8
+        else:
+            return None
+        top = mask.max() if mask.size else 0
+        if np.any((mask != 0) & (mask != top)) or np.any((seed != 0) & (seed != top)):
+            return None
+
+        _, labels = cv2.connectedComponents((mask != 0).view(np.uint8), connectivity=connectivity)
+        reached = np.zeros(labels.max() + 1, dtype=bool)
+        reached[labels[seed != 0]] = True
+        reached[0] = False
+        return np.where(reached[labels], mask, np.zeros_like(mask))
+
+    @staticmethod
+    def Repacked(
+        morph: Callable[[np.ndarray], np.ndarray],
+        image: PackedBinaryImage,
+        out: Optional[PackedBinaryImage] = None,
+    ) -> PackedBinaryImage:
+        """
+        Runs an operation without a bitwise implementation on a packed image: the image is
+        unpacked to 0 / 255, the operation applied and its result packed again
+        Args:
+            morph (Callable): The operation on uint8 images
+            image (PackedBinaryImage): The input image
+            out (PackedBinaryImage, optional): Image of the same shape to write the result into
+        Returns:
+            packed (PackedBinaryImage): The result
+        """
+        result = PackedBinaryImage.FromImage(morph(image.ToImage(255)))
+        if out is None:
+            return result
+        np.copyto(out.words, result.words)
+        return out
+
+    @staticmethod
+    def BorderMarker(image: np.ndarray) -> np.ndarray:
+        """
+        Returns a marker holding the image on its outermost rows and columns and 0 elsewhere
+        Args:
+            image (np.ndarray, 2D): The input image
+        Returns:
+            marker (np.ndarray, 2D): The border marker
+        """
+        marker = np.zeros_like(image)
+        marker[[0, -1], :] = image[[0, -1], :]
+        marker[:, [0, -1]] = image[:, [0, -1]]
+        return marker
 
 
 class Dilator(IMorphOperation):
@@ -15,29 +360,26 @@ class Dilator(IMorphOperation):
 
         self.kernel = kernel
         self.kH, self.kW = kernel.shape
+        self.shape = KernelCache.Derive("morph_shape", kernel, MorphHelper.Shape)
 
-    def Morph(self, image: np.ndarray) -> np.ndarray:
+    def Morph(
+        self,
+        image: Union[np.ndarray, PackedBinaryImage],
+        out: Optional[Union[np.ndarray, PackedBinaryImage]] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> Union[np.ndarray, PackedBinaryImage]:
         """
-        Applies dilation to an image using a specified kernel
+        Applies dilation to an image using a specified kernel, bitwise on packed binary images
         Args:
-            image (np.ndarray, 2D): The input image to be dilated
+            image (np.ndarray | PackedBinaryImage, 2D): The input image to be dilated
+            out (np.ndarray | PackedBinaryImage, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
-            image (np.ndarray, 2D): The dilated image
+            image (np.ndarray | PackedBinaryImage, 2D): The dilated image
         """
-        padH, padW = self.kH // 2, self.kW // 2
-        padded = np.pad(
-            image,
-            ((padH, padH), (padW, padW)),
-            mode="constant",
-            constant_values=0,
-        )
-        output = np.zeros_like(image, dtype=np.uint8)
-
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                region = padded[i : i + self.kH, j : j + self.kW]
-                output[i, j] = np.max(region[self.kernel == 1])
-        return output
+        if isinstance(image, PackedBinaryImage):
+            return image.Dilate(self.kernel, out)
+        return MorphHelper.Apply(image, self.kernel, np.maximum, out, pool)
 
 
 class Eroder(IMorphOperation):
@@ -49,29 +391,26 @@ class Eroder(IMorphOperation):
         """
         self.kernel = kernel
         self.kH, self.kW = kernel.shape
+        self.shape = KernelCache.Derive("morph_shape", kernel, MorphHelper.Shape)
 
-    def Morph(self, image: np.ndarray) -> np.ndarray:
+    def Morph(
+        self,
+        image: Union[np.ndarray, PackedBinaryImage],
+        out: Optional[Union[np.ndarray, PackedBinaryImage]] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> Union[np.ndarray, PackedBinaryImage]:
         """
-        Applies erosion to an image using a specified kernel
+        Applies erosion to an image using a specified kernel, bitwise on packed binary images
         Args:
-            image (np.ndarray, 2D): The input image to be eroded
+            image (np.ndarray | PackedBinaryImage, 2D): The input image to be eroded
+            out (np.ndarray | PackedBinaryImage, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
-            image (np.ndarray, 2D): The eroded image
+            image (np.ndarray | PackedBinaryImage, 2D): The eroded image
         """
-        padH, padW = self.kH // 2, self.kW // 2
-        padded = np.pad(
-            image,
-            ((padH, padH), (padW, padW)),
-            mode="constant",
-            constant_values=0,
-        )
-        output = np.zeros_like(image, dtype=np.uint8)
-
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                region = padded[i : i + self.kH, j : j + self.kW]
-                output[i, j] = np.min(region[self.kernel == 1])
-        return output
+        if isinstance(image, PackedBinaryImage):
+            return image.Erode(self.kernel, out)
+        return MorphHelper.Apply(image, self.kernel, np.minimum, out, pool)
 
 
 class Opener(IMorphOperation):
@@ -81,20 +420,32 @@ class Opener(IMorphOperation):
         Args:
             kernel (np.ndarray, 2D): The kernel to be used for opening morphological operation.
         """
+        self.kernel = kernel
         self.eroder = Eroder(kernel)
         self.dilator = Dilator(kernel)
 
-    def Morph(self, image: np.ndarray) -> np.ndarray:
+    def Morph(
+        self,
+        image: Union[np.ndarray, PackedBinaryImage],
+        out: Optional[Union[np.ndarray, PackedBinaryImage]] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> Union[np.ndarray, PackedBinaryImage]:
         """
-        Applies opening to an image using a specified kernel
+        Applies opening to an image using a specified kernel, erosion and dilation sharing one
+        padded buffer, bitwise on packed binary images
         Args:
-            image (np.ndarray, 2D): The input image to be opened
+            image (np.ndarray | PackedBinaryImage, 2D): The input image to be opened
+            out (np.ndarray | PackedBinaryImage, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
-            image (np.ndarray, 2D): The opened image
+            image (np.ndarray | PackedBinaryImage, 2D): The opened image
         """
-        eroded = self.eroder.Morph(image)
-        opened = self.dilator.Morph(eroded)
-        return opened
+        if isinstance(image, PackedBinaryImage):
+            return self.dilator.Morph(self.eroder.Morph(image), out)
+
+        return MorphHelper.ApplyFused(
+            image, self.kernel, np.minimum, np.maximum, out, pool
+        )
 
 
 class Closer(IMorphOperation):
@@ -104,19 +455,143 @@ class Closer(IMorphOperation):
         Args:
             kernel (np.ndarray, 2D): The kernel to be used for closing morphological operation.
         """
+        self.kernel = kernel
         self.dilator = Dilator(kernel)
         self.eroder = Eroder(kernel)
 
-    def Morph(self, image: np.ndarray) -> np.ndarray:
+    def Morph(
+        self,
+        image: Union[np.ndarray, PackedBinaryImage],
+        out: Optional[Union[np.ndarray, PackedBinaryImage]] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> Union[np.ndarray, PackedBinaryImage]:
+        """
+        Applies closing to an image using a specified kernel, dilation and erosion sharing one
+        padded buffer, bitwise on packed binary images
+        Args:
+            image (np.ndarray | PackedBinaryImage, 2D): The input image to be closed
+            out (np.ndarray | PackedBinaryImage, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+        Returns:
+            image (np.ndarray | PackedBinaryImage, 2D): The closed image
+        """
+        if isinstance(image, PackedBinaryImage):
+            return self.eroder.Morph(self.dilator.Morph(image), out)
+
+        return MorphHelper.ApplyFused(
+            image, self.kernel, np.maximum, np.minimum, out, pool
+        )
+
+
+class Reconstructor(IMorphOperation):
+    def __init__(
+        self,
+        kernel: Optional[np.ndarray] = None,
+        marker: Optional[np.ndarray] = None,
+        connectivity: int = 8,
+    ):
+        """
+        Constructor for Reconstructor class
+        Args:
+            kernel (np.ndarray, 2D, optional): Kernel eroding the image into the marker when no marker is given (opening by reconstruction). Defaults to a 3x3 square.
+            marker (np.ndarray, 2D, optional): The marker to reconstruct under the image. Defaults to None.
+            connectivity (int, optional): Pixel connectivity of the propagation, 4 or 8. Defaults to 8.
+        """
+        self.kernel = kernel if kernel is not None else MorphKernelGenerator.GetSquareKernel(3)
+        self.marker = marker
+        self.neighborhood = MorphHelper.Connectivity(connectivity)
+        self.eroder = Eroder(self.kernel)
+
+    def Morph(
+        self,
+        image: Union[np.ndarray, PackedBinaryImage],
+        out: Optional[Union[np.ndarray, PackedBinaryImage]] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> Union[np.ndarray, PackedBinaryImage]:
+        """
+        Applies reconstruction by dilation of the marker under the image, which keeps every
+        connected structure the marker touches and removes the others
+        Args:
+            image (np.ndarray | PackedBinaryImage, 2D): The input image, used as the mask
+            out (np.ndarray | PackedBinaryImage, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+        Returns:
+            image (np.ndarray | PackedBinaryImage, 2D): The reconstructed image
+        """
+        if isinstance(image, PackedBinaryImage):
+            return MorphHelper.Repacked(lambda unpacked: self.Morph(unpacked, pool=pool), image, out)
+        marker = self.marker
+        if marker is None:
+            marker = self.eroder.Morph(image, pool=pool)
+        result = MorphHelper.Reconstruct(marker, image, self.neighborhood)
+        return BufferPool.Write(result, out)
+
+
+class HoleFiller(IMorphOperation):
+    def __init__(self, connectivity: int = 4):
         """
-        Applies closing to an image using a specified kernel
+        Constructor for HoleFiller class
         Args:
-            image (np.ndarray, 2D): The input image to be closed
+            connectivity (int, optional): Connectivity of the background, 4 or 8. Defaults to 4.
+        """
+        self.neighborhood = MorphHelper.Connectivity(connectivity)
+
+    def Morph(
+        self,
+        image: Union[np.ndarray, PackedBinaryImage],
+        out: Optional[Union[np.ndarray, PackedBinaryImage]] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> Union[np.ndarray, PackedBinaryImage]:
+        """
+        Fills holes, the background regions not connected to the image border (e.g. the loops
+        of characters): the background is reconstructed from the border and whatever it does
+        not reach is set to foreground
+        Args:
+            image (np.ndarray | PackedBinaryImage, 2D, uint8): The input (foreground bright) image
+            out (np.ndarray | PackedBinaryImage, 2D, uint8, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
-            image (np.ndarray, 2D): The closed image
+            image (np.ndarray | PackedBinaryImage, 2D, uint8): The image with its holes filled
         """
-        dilated = self.dilator.Morph(image)
-        closed = self.eroder.Morph(dilated)
-        return closed
+        if isinstance(image, PackedBinaryImage):
+            return MorphHelper.Repacked(lambda unpacked: self.Morph(unpacked, pool=pool), image, out)
+        top = np.iinfo(image.dtype).max if np.issubdtype(image.dtype, np.integer) else 1.0
+        background = top - image
+        reached = MorphHelper.Reconstruct(
+            MorphHelper.BorderMarker(background), background, self.neighborhood
+        )
+        return BufferPool.Write(top - reached, out)
+
 
+class BorderClearer(IMorphOperation):
+    def __init__(self, connectivity: int = 8):
+        """
+        Constructor for BorderClearer class
+        Args:
+            connectivity (int, optional): Connectivity of the foreground, 4 or 8. Defaults to 8.
+        """
+        self.neighborhood = MorphHelper.Connectivity(connectivity)
 
+    def Morph(
+        self,
+        image: Union[np.ndarray, PackedBinaryImage],
+        out: Optional[Union[np.ndarray, PackedBinaryImage]] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> Union[np.ndarray, PackedBinaryImage]:
+        """
+        Removes the foreground structures touching the image border (e.g. margin noise or
+        scanner edges), by subtracting their reconstruction from the border
+        Args:
+            image (np.ndarray | PackedBinaryImage, 2D): The input (foreground bright) image
+            out (np.ndarray | PackedBinaryImage, 2D, optional): Buffer to write the result into, must not overlap the image
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+        Returns:
+            image (np.ndarray | PackedBinaryImage, 2D): The image without the structures touching its border
+        """
+        if isinstance(image, PackedBinaryImage):
+            return MorphHelper.Repacked(lambda unpacked: self.Morph(unpacked, pool=pool), image, out)
+        touching = MorphHelper.Reconstruct(
+            MorphHelper.BorderMarker(image), image, self.neighborhood
+        )
+        np.subtract(image, touching, out=touching)
+        return BufferPool.Write(touching, out)
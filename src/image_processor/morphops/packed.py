@@ -0,0 +1,260 @@
+import numpy as np
+from typing import Callable, Optional, Tuple
+
+from src.utils import MorphKernelGenerator
+
+
+class PackedBinaryImage:
+    """
+    Binary image stored as bits, 64 pixels per uint64 word. Pixel (i, j) is bit j % 64 of
+    words[i, j // 64]; the bits past the image width in the last word of every row are
+    always zero. Morphology runs on whole words with shifts, OR (dilation) and AND (erosion).
+    """
+
+    WORD_BITS = 64
+    # Rough cost of one decomposed rectangle, in shifted-image operations
+    RECT_COST = 4
+
+    def __init__(self, words: np.ndarray, width: int):
+        """
+        Constructor for PackedBinaryImage class
+        Args:
+            words (np.ndarray, 2D, uint64): The packed rows, ceil(width / 64) words each
+            width (int): The image width in pixels
+        """
+        if words.dtype != np.uint64 or words.ndim != 2:
+            raise ValueError("Words must be a 2D uint64 array")
+        if words.shape[1] != -(-width // PackedBinaryImage.WORD_BITS):
+            raise ValueError("Word count does not match the image width")
+
+        self.words = words
+        self.width = width
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """
+        The (height, width) of the image in pixels
+        """
+        return self.words.shape[0], self.width
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The memory held by the packed words, in bytes
+        """
+        return self.words.nbytes
+
+    @staticmethod
+    def FromImage(image: np.ndarray, threshold: float = 0) -> "PackedBinaryImage":
+        """
+        Packs an image, pixels above the threshold become 1
+        Args:
+            image (np.ndarray, 2D): The input image, e.g. a thresholded uint8 page
+            threshold (float, optional): Pixels above it are foreground. Defaults to 0.
+        Returns:
+            packed (PackedBinaryImage): The packed image
+        """
+        h, w = image.shape
+        n_words = -(-w // PackedBinaryImage.WORD_BITS)
+        packed = np.zeros((h, n_words * 8), dtype=np.uint8)
+        packed[:, : -(-w // 8)] = np.packbits(image > threshold, axis=1, bitorder="little")
+        return PackedBinaryImage(packed.view("<u8").astype(np.uint64, copy=False), w)
+
+    def ToImage(
+        self, max_value: int = 255, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Unpacks the image to uint8
+        Args:
+            max_value (int, optional): The value of foreground pixels. Defaults to 255.
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the image into
+        Returns:
+            image (np.ndarray, 2D, uint8): The image with 0 background and max_value foreground
+        """
+        raw = self.words.astype("<u8", copy=False).view(np.uint8)
+        bits = np.unpackbits(raw, axis=1, count=self.width, bitorder="little")
+        return np.multiply(bits, np.uint8(max_value), out=bits if out is None else out)
+
+    def Copy(self) -> "PackedBinaryImage":
+        """
+        Returns a copy of the image
+        """
+        return PackedBinaryImage(self.words.copy(), self.width)
+
+    def Shift(self, dy: int, dx: int) -> np.ndarray:
+        """
+        Shifts the image content, filling with zeros
+        Args:
+            dy (int): Rows to read ahead, result pixel (i, j) is source pixel (i + dy, j + dx)
+            dx (int): Columns to read ahead
+        Returns:
+            words (np.ndarray, 2D, uint64): The shifted packed rows
+        """
+        words = PackedBinaryImage._ShiftColumns(self.words, dx, self.width)
+        return PackedBinaryImage._ShiftRows(words, dy)
+
+    def Dilate(
+        self, kernel: np.ndarray, out: Optional["PackedBinaryImage"] = None
+    ) -> "PackedBinaryImage":
+        """
+        Dilates the image with the 1 entries of a kernel, with the same window placement and
+        zero border as Dilator on uint8 images
+        Args:
+            kernel (np.ndarray, 2D): The kernel
+            out (PackedBinaryImage, optional): Image of the same shape to write the result into
+        Returns:
+            packed (PackedBinaryImage): The dilated image
+        """
+        return self._Apply(kernel, np.bitwise_or, out)
+
+    def Erode(
+        self, kernel: np.ndarray, out: Optional["PackedBinaryImage"] = None
+    ) -> "PackedBinaryImage":
+        """
+        Erodes the image with the 1 entries of a kernel, with the same window placement and
+        zero border as Eroder on uint8 images
+        Args:
+            kernel (np.ndarray, 2D): The kernel
+            out (PackedBinaryImage, optional): Image of the same shape to write the result into
+        Returns:
+            packed (PackedBinaryImage): The eroded image
+        """
+        return self._Apply(kernel, np.bitwise_and, out)
+
+    def _Apply(
+        self,
+        kernel: np.ndarray,
+        op: np.ufunc,
+        out: Optional["PackedBinaryImage"],
+    ) -> "PackedBinaryImage":
+        ys, xs = np.nonzero(kernel == 1)
+        if ys.size == 0:
+            raise ValueError("Kernel must contain at least one 1")
+        padH, padW = kernel.shape[0] // 2, kernel.shape[1] // 2
+
+        # Rectangles (squares, lines, the arms of a cross) take a run along the rows and a
+        # run along the columns each, in O(log k) shifts, unless the element is too fragmented
+        rects = MorphKernelGenerator.Decompose(kernel)
+        if len(rects) * PackedBinaryImage.RECT_COST < ys.size:
+            words = None
+            for y0, x0, kh, kw in rects:
+                part = self._ColumnRun(self.words, kw, x0 - padW, op)
+                part = self._RowRun(part, kh, y0 - padH, op)
+                words = part if words is None else op(words, part, out=words)
+        else:
+            words = self.Shift(ys[0] - padH, xs[0] - padW)
+            for y, x in zip(ys[1:], xs[1:]):
+                op(words, self.Shift(y - padH, x - padW), out=words)
+
+        if out is None:
+            return PackedBinaryImage(words, self.width)
+        np.copyto(out.words, words)
+        return out
+
+    @staticmethod
+    def _Run(
+        words: np.ndarray,
+        length: int,
+        op: np.ufunc,
+        shift: Callable[[np.ndarray, int], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Combines the shifts 0 .. length - 1 (reading ahead) in O(log length) steps, by doubling
+        the covered run and adding the powers of two that make up the length
+        """
+        result, power, covered, start = None, words, 1, 0
+        remaining = length
+        while remaining:
+            if remaining & 1:
+                part = shift(power, start)
+                result = part if result is None else op(result, part, out=result)
+                start += covered
+            remaining >>= 1
+            if remaining:
+                power = op(power, shift(power, covered))
+                covered *= 2
+        return result
+
+    def _ColumnRun(
+        self, words: np.ndarray, length: int, offset: int, op: np.ufunc
+    ) -> np.ndarray:
+        """
+        Result bit j of every row combines source bits j + offset .. j + offset + length - 1.
+        Partial runs only ever read ahead, so with a negative offset the rows are first widened
+        on the left, keeping the runs that start before the image border.
+        """
+        bits = PackedBinaryImage.WORD_BITS
+        shift = lambda w, dx: PackedBinaryImage._ShiftColumns(w, dx, w.shape[1] * bits)
+        if offset >= 0:
+            run = PackedBinaryImage._Run(words, length, op, shift)
+            return PackedBinaryImage._ShiftColumns(run, offset, self.width)
+
+        margin = -offset
+        n = words.shape[1]
+        wide = np.zeros((words.shape[0], -(-(self.width + margin) // bits)), dtype=np.uint64)
+        wide[:, :n] = words
+        wide = PackedBinaryImage._ShiftColumns(wide, -margin, wide.shape[1] * bits)
+        run = PackedBinaryImage._Run(wide, length, op, shift)[:, :n]
+        tail = self.width % bits
+        if tail:
+            run[:, -1] &= np.uint64((1 << tail) - 1)
+        return np.ascontiguousarray(run)
+
+    @staticmethod
+    def _RowRun(
+        words: np.ndarray, length: int, offset: int, op: np.ufunc
+    ) -> np.ndarray:
+        """
+        Result row i combines source rows i + offset .. i + offset + length - 1, rows outside
+        the image being zero
+        """
+        shift = PackedBinaryImage._ShiftRows
+        if offset >= 0:
+            return shift(PackedBinaryImage._Run(words, length, op, shift), offset)
+
+        h = words.shape[0]
+        tall = np.zeros((h - offset, words.shape[1]), dtype=np.uint64)
+        tall[-offset:] = words
+        return PackedBinaryImage._Run(tall, length, op, shift)[:h]
+
+    @staticmethod
+    def _ShiftColumns(words: np.ndarray, dx: int, width: int) -> np.ndarray:
+        """
+        Result bit j of every row is source bit j + dx, carrying across word boundaries.
+        Bits pushed past the width are cleared.
+        """
+        bits = PackedBinaryImage.WORD_BITS
+        n = words.shape[1]
+        shifted = np.zeros_like(words)
+        q, r = divmod(abs(dx), bits)
+        if q >= n:
+            return shifted
+
+        if dx >= 0:
+            # Bits move towards lower indices: take higher words, shifted right
+            shifted[:, : n - q] = words[:, q:] >> np.uint64(r)
+            if r:
+                shifted[:, : n - q - 1] |= words[:, q + 1 :] << np.uint64(bits - r)
+        else:
+            shifted[:, q:] = words[:, : n - q] << np.uint64(r)
+            if r:
+                shifted[:, q + 1 :] |= words[:, : n - q - 1] >> np.uint64(bits - r)
+            tail = width % bits
+            if tail:
+                shifted[:, -1] &= np.uint64((1 << tail) - 1)
+        return shifted
+
+    @staticmethod
+    def _ShiftRows(words: np.ndarray, dy: int) -> np.ndarray:
+        """
+        Result row i is source row i + dy, rows outside the image are zero
+        """
+        h = words.shape[0]
+        shifted = np.zeros_like(words)
+        if abs(dy) >= h:
+            return shifted
+        if dy >= 0:
+            shifted[: h - dy] = words[dy:]
+        else:
+            shifted[-dy:] = words[: h + dy]
+        return shifted
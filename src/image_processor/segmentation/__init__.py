@@ -1,4 +1,6 @@
 from .interface import ISegmenter
+from .region import Region
+from .layout import Layout, LayoutAnalyzer
 from .builder import SegmentationBuilder, SegmentationType
 from .core import (
     CCA_Segmentation,
@@ -9,6 +11,9 @@ from .core import (
 
 __all__ = [
     "ISegmenter",
+    "Region",
+    "Layout",
+    "LayoutAnalyzer",
     "SegmentationBuilder",
     "SegmentationType",
     "CCA_Segmentation",
@@ -1,9 +1,50 @@
 from .interface import ISegmenter
+from .region import Region
 from src.image_processor.morphops import IMorphOperation
 
 import cv2
 import numpy as np
-from typing import List
+from typing import List, Optional, Tuple, Union
+
+
+class SegmentationHelper:
+    @staticmethod
+    def Runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the runs of consecutive True values in a 1D mask from the edges of the mask
+        Args:
+            mask (np.ndarray, 1D, bool): The mask, e.g. profile > threshold
+        Returns:
+            starts (np.ndarray, 1D): The first index of every run
+            ends (np.ndarray, 1D): One past the last index of every run
+        """
+        edges = np.diff(mask.astype(np.int8), prepend=0, append=0)
+        return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    @staticmethod
+    def Preprocess(
+        region: Region, morphop: Optional[IMorphOperation], mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Returns the preprocessed pixels of a region. With a page-level mask (the morphological
+        operation applied once to the whole page) this is the region's slice of it; otherwise
+        the operation runs on the crop. The two only differ within half a kernel of the crop
+        edges: the page mask sees the pixels outside the crop where the crop sees zero padding.
+        Args:
+            region (Region): The region to segment
+            morphop (IMorphOperation | None): The segmenter's morphological operation
+            mask (np.ndarray, 2D, optional): The page-level mask, aligned with region.page (the
+                region's box of it is warped when the region carries a deskewing transform)
+        Returns:
+            processed (np.ndarray, 2D): The preprocessed region
+        """
+        if mask is not None:
+            if mask.shape[:2] != region.page.shape[:2]:
+                raise ValueError("Mask must have the shape of the region's page")
+            if region.transform is not None:
+                return region.transform.Warp(mask, region.box)
+            return mask[region.y : region.y + region.h, region.x : region.x + region.w]
+        return morphop.Morph(region.view) if morphop is not None else region.view
 
 
 class HPP_Segmentation(ISegmenter):
@@ -22,38 +63,33 @@ class HPP_Segmentation(ISegmenter):
         self.threshold_ratio = threshold_ratio
         self.morphop = morphop
 
-    def Segment(self, image: np.ndarray) -> List[np.ndarray]:
+    def SegmentRegions(
+        self,
+        image: Union[np.ndarray, Region],
+        parent: int = -1,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Region]:
+        region = Region.Of(image)
+        image = region.view
         if image.size == 0:
             return []
 
-        processed_image = (self.morphop.Morph(image)
-                           if self.morphop is not None else image)
+        processed_image = SegmentationHelper.Preprocess(region, self.morphop, mask)
 
         # Horizontal Projection Profile (HPP)
         hpp = np.sum(processed_image.astype(np.uint32), axis=1)
         mean_val = np.mean(hpp)
         threshold = mean_val * self.threshold_ratio
 
-        start_indices, end_indices = [], []
-        in_segment = False
+        starts, ends = SegmentationHelper.Runs(hpp > threshold)
+        keep = ends - starts >= self.min_height
+        tops = np.maximum(0, starts[keep] - self.margin)
+        bottoms = np.minimum(image.shape[0], ends[keep] + self.margin)
 
-        for i, val in enumerate(hpp):
-            if val > threshold and not in_segment:
-                start_indices.append(i)
-                in_segment = True
-            elif val <= threshold and in_segment:
-                end_indices.append(i)
-                in_segment = False
-        if in_segment:
-            end_indices.append(len(hpp))
-
-        segments = []
-        for start, end in zip(start_indices, end_indices):
-            if end - start >= self.min_height:
-                crop = image[max(0, start - self.margin):min(image.shape[0], end + self.margin), :]
-                segments.append(crop)
-
-        return segments
+        boxes = np.stack(
+            [np.zeros_like(tops), tops, np.full_like(tops, image.shape[1]), bottoms - tops], axis=1
+        )
+        return region.Children(boxes, parent)
 
 
 class VPP_Segmentation(ISegmenter):
@@ -72,12 +108,18 @@ class VPP_Segmentation(ISegmenter):
         self.threshold_ratio = threshold_ratio
         self.morphop = morphop
 
-    def Segment(self, image: np.ndarray) -> List[np.ndarray]:
+    def SegmentRegions(
+        self,
+        image: Union[np.ndarray, Region],
+        parent: int = -1,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Region]:
+        region = Region.Of(image)
+        image = region.view
         if image.size == 0:
             return []
 
-        processed_image = (self.morphop.Morph(image)
-                           if self.morphop is not None else image)
+        processed_image = SegmentationHelper.Preprocess(region, self.morphop, mask)
 
         # Vertical Projection Profile (VPP)
         vpp = np.sum(processed_image.astype(np.uint32), axis=0)
@@ -85,25 +127,15 @@ class VPP_Segmentation(ISegmenter):
         mean_val = np.mean(vpp_smooth)
         threshold = mean_val * self.threshold_ratio
 
-        segments = []
-        in_segment = False
-        segment_start = 0
-
-        for i, val in enumerate(vpp_smooth):
-            if val > threshold and not in_segment:
-                segment_start = i
-                in_segment = True
-            elif val <= threshold and in_segment:
-                if i - segment_start >= self.min_width:
-                    crop = image[:, max(0, segment_start - self.margin):min(image.shape[1], i + self.margin)]
-                    segments.append(crop)
-                in_segment = False
-
-        if in_segment and len(vpp_smooth) - segment_start >= self.min_width:
-            crop = image[:, max(0, segment_start - self.margin):min(image.shape[1], len(vpp_smooth) + self.margin)]
-            segments.append(crop)
+        starts, ends = SegmentationHelper.Runs(vpp_smooth > threshold)
+        keep = ends - starts >= self.min_width
+        lefts = np.maximum(0, starts[keep] - self.margin)
+        rights = np.minimum(image.shape[1], ends[keep] + self.margin)
 
-        return segments
+        boxes = np.stack(
+            [lefts, np.zeros_like(lefts), rights - lefts, np.full_like(lefts, image.shape[0])], axis=1
+        )
+        return region.Children(boxes, parent)
 
 
 class CCA_Segmentation(ISegmenter):
@@ -117,28 +149,28 @@ class CCA_Segmentation(ISegmenter):
         self.min_char_height = min_height
         self.morphop = morphop
 
-    def Segment(self, image: np.ndarray) -> List[np.ndarray]:
+    def SegmentRegions(
+        self,
+        image: Union[np.ndarray, Region],
+        parent: int = -1,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Region]:
+        region = Region.Of(image)
+        image = region.view
         if image.size == 0:
             return []
 
-        processed_image = (self.morphop.Morph(image)
-                           if self.morphop is not None else image)
+        processed_image = SegmentationHelper.Preprocess(region, self.morphop, mask)
 
         num_labels, _, stats, _ = cv2.connectedComponentsWithStats(
             processed_image.astype(np.uint8), 8, cv2.CV_32S
         )
 
-        components = []
-        for i in range(1, num_labels):  # skip background
-            x, y, w, h = stats[i, cv2.CC_STAT_LEFT], stats[i, cv2.CC_STAT_TOP], \
-                         stats[i, cv2.CC_STAT_WIDTH], stats[i, cv2.CC_STAT_HEIGHT]
-
-            if h >= self.min_char_height:
-                crop = image[y:y + h, x:x + w]
-                components.append((x, crop))
+        stats = stats[1:num_labels]  # skip background
+        stats = stats[stats[:, cv2.CC_STAT_HEIGHT] >= self.min_char_height]
+        stats = stats[np.argsort(stats[:, cv2.CC_STAT_LEFT], kind="stable")]
 
-        components.sort(key=lambda item: item[0])
-        return [comp[1] for comp in components]
+        return region.Children(stats[:, :4], parent)
 
 
 class Contour_Segmentation(ISegmenter):
@@ -157,24 +189,35 @@ class Contour_Segmentation(ISegmenter):
         self.margin = margin
         self.morphop = morphop
 
-    def Segment(self, image: np.ndarray) -> List[np.ndarray]:
+    def SegmentRegions(
+        self,
+        image: Union[np.ndarray, Region],
+        parent: int = -1,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Region]:
+        region = Region.Of(image)
+        image = region.view
         if image.size == 0:
             return []
 
-        processed_image = (self.morphop.Morph(image)
-                           if self.morphop is not None else image)
+        processed_image = SegmentationHelper.Preprocess(region, self.morphop, mask)
 
         contours, _ = cv2.findContours(
             processed_image.astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
         )
 
-        segments = []
-        for cnt in contours:
-            x, y, w, h = cv2.boundingRect(cnt)
-            if h >= self.min_height and w >= self.min_width:
-                crop = image[max(0, y - self.margin):min(image.shape[0], y + h + self.margin),
-                             max(0, x - self.margin):min(image.shape[1], x + w + self.margin)]
-                segments.append((x, crop))
+        boxes = np.array([cv2.boundingRect(cnt) for cnt in contours], dtype=np.int64)
+        boxes = boxes.reshape(-1, 4)
+        x, y, w, h = boxes.T
+        boxes = boxes[(h >= self.min_height) & (w >= self.min_width)]
+        boxes = boxes[np.argsort(boxes[:, 0], kind="stable")]
 
-        segments.sort(key=lambda s: s[0])
-        return [s[1] for s in segments]
+        x, y, w, h = boxes.T
+        tops = np.maximum(0, y - self.margin)
+        bottoms = np.minimum(image.shape[0], y + h + self.margin)
+        lefts = np.maximum(0, x - self.margin)
+        rights = np.minimum(image.shape[1], x + w + self.margin)
+
+        return region.Children(
+            np.stack([lefts, tops, rights - lefts, bottoms - tops], axis=1), parent
+        )
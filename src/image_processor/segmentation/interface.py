@@ -1,9 +1,19 @@
+from .region import Region
+
 import numpy as np
-from typing import List
+from typing import List, Optional, Union
 from abc import ABC, abstractmethod
 
 
 class ISegmenter(ABC):
     @abstractmethod
-    def Segment(self, image: np.ndarray) -> List[np.ndarray]:
+    def SegmentRegions(
+        self,
+        image: Union[np.ndarray, Region],
+        parent: int = -1,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Region]:
         raise NotImplementedError
+
+    def Segment(self, image: Union[np.ndarray, Region]) -> List[np.ndarray]:
+        return [region.view for region in self.SegmentRegions(image)]
@@ -0,0 +1,222 @@
+from .region import Region
+from src.utils import SkewTransform
+from src.image_processor.thresholding import OtsuThresholding
+
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+
+
+class Layout:
+    """
+    The line / word / character hierarchy of a page. Every level is a list of Regions in
+    reading order; a word's parent is the index of its line in lines, a character's parent
+    the index of its word in words.
+    """
+
+    __slots__ = ("lines", "words", "chars")
+
+    def __init__(self, lines: List[Region], words: List[Region], chars: List[Region]):
+        """
+        Constructor for Layout class
+        Args:
+            lines (List[Region]): The lines, top to bottom
+            words (List[Region]): The words of all lines, line by line and left to right
+            chars (List[Region]): The characters of all words, word by word and left to right
+        """
+        self.lines = lines
+        self.words = words
+        self.chars = chars
+
+    def WordsOf(self, line_index: int) -> List[Region]:
+        """
+        Returns the words of a line
+        Args:
+            line_index (int): The index of the line in lines
+        Returns:
+            words (List[Region]): The words, left to right
+        """
+        return [word for word in self.words if word.parent == line_index]
+
+    def CharsOf(self, word_index: int) -> List[Region]:
+        """
+        Returns the characters of a word
+        Args:
+            word_index (int): The index of the word in words
+        Returns:
+            chars (List[Region]): The characters, left to right
+        """
+        return [char for char in self.chars if char.parent == word_index]
+
+
+class LayoutAnalyzer:
+    def __init__(
+        self,
+        min_height: int = 5,
+        min_area: int = 2,
+        margin: int = 2,
+        word_gap: Optional[int] = None,
+        gap_ratio: float = 0.2,
+        attach_ratio: float = 0.5,
+    ):
+        """
+        Single-pass layout analysis: the page is labelled once and the component boxes are
+        grouped into lines, words and characters with vectorized interval merging.
+        Args:
+            min_height (int): Minimum height for a component to start a line and for a character to be kept.
+            min_area (int): Components with fewer pixels are dropped as noise.
+            margin (int): Pixel margin added above and below lines and left and right of words.
+            word_gap (int, optional): Gap in pixels above which two characters belong to different words.
+                Defaults to None, estimated from the page by clustering the character gaps.
+            gap_ratio (float): Lower bound of the estimated word gap, relative to the median character height.
+            attach_ratio (float): Components too short to start a line only join a line when their center is
+                at most this fraction of the line height outside it, the others are dropped as noise.
+        """
+        self.min_height = min_height
+        self.min_area = min_area
+        self.margin = margin
+        self.word_gap = word_gap
+        self.gap_ratio = gap_ratio
+        self.attach_ratio = attach_ratio
+
+    def Analyze(
+        self, image: np.ndarray, transform: Optional[SkewTransform] = None
+    ) -> Layout:
+        """
+        Segments a binary page (foreground > 0) into lines, words and characters
+        Args:
+            image (np.ndarray, 2D): The thresholded page
+            transform (SkewTransform, optional): The deskewing transform of the page. The page is
+                labelled as it is and the component boxes are mapped to deskewed coordinates
+                before grouping, so only the regions that are viewed get warped. Defaults to None.
+        Returns:
+            layout (Layout): The page-absolute regions of every level
+        """
+        page = Region(0, 0, image.shape[1], image.shape[0], image, -1, transform)
+        H, W = image.shape[:2]
+        if image.size == 0:
+            return Layout([], [], [])
+
+        _, _, stats, _ = cv2.connectedComponentsWithStats(
+            (image > 0).astype(np.uint8), 8, cv2.CV_32S
+        )
+        stats = stats[1:].astype(np.int64)  # skip background
+        stats = stats[stats[:, cv2.CC_STAT_AREA] >= self.min_area]
+        x, y, w, h = stats[:, :4].T
+        if transform is not None:
+            # Move the boxes with their centers: the bounding boxes of the rotated corners are
+            # inflated by h * sin(angle) on each side, enough to merge neighbouring glyphs
+            centers = transform.Map(np.stack([x + w / 2, y + h / 2], axis=1))
+            x = np.clip(np.rint(centers[:, 0] - w / 2).astype(np.int64), 0, W - w)
+            y = np.clip(np.rint(centers[:, 1] - h / 2).astype(np.int64), 0, H - h)
+        right, bottom = x + w, y + h
+
+        core = h >= self.min_height
+        if not np.any(core):
+            return Layout([], [], [])
+
+        line, line_top, line_bottom = self._Lines(y, bottom, core)
+        attached = line >= 0
+        x, y, right, bottom, line = (
+            x[attached], y[attached], right[attached], bottom[attached], line[attached]
+        )
+
+        # Characters: components of a line overlapping horizontally (the dot of an i, broken
+        # strokes). Sorting by (line, x) and offsetting x by line * (W + 1) turns the per-line
+        # running maximum of right edges into one running maximum over the whole array.
+        order = np.lexsort((x, line))
+        x, y, right, bottom, line = x[order], y[order], right[order], bottom[order], line[order]
+        offset = line * (W + 1)
+        reach = np.maximum.accumulate(right + offset)
+        starts = np.flatnonzero(np.r_[True, x[1:] + offset[1:] >= reach[:-1]])
+        cx = np.minimum.reduceat(x, starts)
+        cy = np.minimum.reduceat(y, starts)
+        cr = np.maximum.reduceat(right, starts)
+        cb = np.maximum.reduceat(bottom, starts)
+        cline = line[starts]
+
+        # Words: consecutive characters of a line separated by no more than the word gap
+        same_line = cline[1:] == cline[:-1]
+        gaps = cx[1:] - cr[:-1]
+        threshold = self._WordGap(gaps[same_line], cb - cy)
+        word_starts = np.flatnonzero(np.r_[True, ~same_line | (gaps > threshold)])
+        wx = np.minimum.reduceat(cx, word_starts)
+        wr = np.maximum.reduceat(cr, word_starts)
+        wline = cline[word_starts]
+        first = np.zeros(cx.size, dtype=np.int64)
+        first[word_starts] = 1
+        cword = np.cumsum(first) - 1
+
+        # Lines span the page width and words their line's height, as HPP and VPP crops do
+        lt = np.maximum(0, line_top - self.margin)
+        lb = np.minimum(H, line_bottom + self.margin)
+        lines = page.Children(
+            np.stack([np.zeros_like(lt), lt, np.full_like(lt, W), lb - lt], axis=1)
+        )
+
+        wl = np.maximum(0, wx - self.margin)
+        wrr = np.minimum(W, wr + self.margin)
+        words = [
+            Region(left, lt[li], r - left, lb[li] - lt[li], image, li, transform)
+            for left, r, li in zip(wl.tolist(), wrr.tolist(), wline.tolist())
+        ]
+
+        keep = cb - cy >= self.min_height
+        chars = [
+            Region(left, top, r - left, b - top, image, wi, transform)
+            for left, top, r, b, wi in zip(
+                cx[keep].tolist(), cy[keep].tolist(), cr[keep].tolist(),
+                cb[keep].tolist(), cword[keep].tolist(),
+            )
+        ]
+        return Layout(lines, words, chars)
+
+    def _Lines(
+        self, top: np.ndarray, bottom: np.ndarray, core: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Groups components into lines by merging the overlapping vertical extents of the core
+        (tall enough) components. The small ones (dots, commas, accents) join the line nearest to
+        their center if it lies within attach_ratio * line height of it; the rest are specks
+        that would otherwise stretch a line far beyond its text.
+        Returns:
+            line (np.ndarray, 1D): The line index of every component, -1 for dropped specks
+            line_top (np.ndarray, 1D): The top row of every line
+            line_bottom (np.ndarray, 1D): One past the bottom row of every line
+        """
+        ct, cb = top[core], bottom[core]
+        order = np.argsort(ct, kind="stable")
+        ct, cb = ct[order], cb[order]
+        reach = np.maximum.accumulate(cb)
+        starts = np.flatnonzero(np.r_[True, ct[1:] >= reach[:-1]])
+        line_top = ct[starts]
+        line_bottom = np.maximum.reduceat(cb, starts)
+
+        # Lines are disjoint and sorted, the nearest is one of the two around the center
+        center = (top + bottom) / 2
+        below = np.clip(np.searchsorted(line_top, center, side="right") - 1, 0, starts.size - 1)
+        above = np.minimum(below + 1, starts.size - 1)
+        dist = lambda k: np.maximum(
+            np.maximum(line_top[k] - center, center - line_bottom[k]), 0
+        )
+        line = np.where(dist(above) < dist(below), above, below)
+        reach = self.attach_ratio * (line_bottom - line_top)
+        line[~core & (dist(line) > reach[line])] = -1
+
+        kept = line >= 0
+        np.minimum.at(line_top, line[kept], top[kept])
+        np.maximum.at(line_bottom, line[kept], bottom[kept])
+        return line, line_top, line_bottom
+
+    def _WordGap(self, gaps: np.ndarray, heights: np.ndarray) -> float:
+        """
+        The gap above which characters are split into words: the given word gap, or the Otsu
+        split between letter and word spacing, no smaller than gap_ratio * median height
+        """
+        if self.word_gap is not None:
+            return self.word_gap
+        floor = self.gap_ratio * np.median(heights)
+        if gaps.size == 0:
+            return floor
+        hist = np.bincount(np.maximum(gaps, 0))
+        return max(OtsuThresholding.ComputeThreshold(hist), floor)
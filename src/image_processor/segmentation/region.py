@@ -0,0 +1,101 @@
+from src.utils import SkewTransform
+
+import numpy as np
+from typing import List, Optional, Tuple, Union
+
+
+class Region:
+    """
+    A segmented region of a page: its page-absolute bounding box, the index of the region it
+    was segmented from (-1 for the page itself) and a reference to the page. The pixels are
+    only sliced out of the page when the view is requested, nothing is copied.
+    With a deskewing transform the box is in deskewed page coordinates while the page is the
+    original scan, and the view resamples just the region from it.
+    """
+
+    __slots__ = ("x", "y", "w", "h", "parent", "page", "transform")
+
+    def __init__(
+        self,
+        x: int,
+        y: int,
+        w: int,
+        h: int,
+        page: np.ndarray,
+        parent: int = -1,
+        transform: Optional[SkewTransform] = None,
+    ):
+        """
+        Constructor for Region class
+        Args:
+            x (int): Left edge in page coordinates
+            y (int): Top edge in page coordinates
+            w (int): Width in pixels
+            h (int): Height in pixels
+            page (np.ndarray, 2D): The page image the coordinates refer to
+            parent (int, optional): Index of the region this one was segmented from. Defaults to -1 (the page).
+            transform (SkewTransform, optional): The deskewing transform of the page. Defaults to None.
+        """
+        self.x = int(x)
+        self.y = int(y)
+        self.w = int(w)
+        self.h = int(h)
+        self.page = page
+        self.parent = parent
+        self.transform = transform
+
+    @staticmethod
+    def Of(image: Union[np.ndarray, "Region"]) -> "Region":
+        """
+        Returns the region covering a whole image, regions are returned as they are
+        Args:
+            image (np.ndarray, 2D | Region): The image or region
+        Returns:
+            region (Region): The region, with the image as its page
+        """
+        if isinstance(image, Region):
+            return image
+        return Region(0, 0, image.shape[1], image.shape[0], image)
+
+    @property
+    def view(self) -> np.ndarray:
+        """
+        The region pixels, a view into the page, or a freshly warped crop with a transform
+        """
+        if self.transform is not None:
+            return self.transform.Warp(self.page, self.box)
+        return self.page[self.y : self.y + self.h, self.x : self.x + self.w]
+
+    @property
+    def box(self) -> Tuple[int, int, int, int]:
+        """
+        The (x, y, w, h) bounding box in page coordinates
+        """
+        return self.x, self.y, self.w, self.h
+
+    @property
+    def original_box(self) -> Tuple[int, int, int, int]:
+        """
+        The (x, y, w, h) bounding box in the coordinates of the original (skewed) page
+        """
+        if self.transform is None:
+            return self.box
+        return tuple(self.transform.MapBoxes(self.box, inverse=True)[0].tolist())
+
+    def Children(self, boxes: np.ndarray, parent: int = -1) -> List["Region"]:
+        """
+        Creates sub-regions from boxes relative to this region
+        Args:
+            boxes (np.ndarray, 2D): One (x, y, w, h) row per sub-region, relative to this region
+            parent (int, optional): The index of this region, stored in the sub-regions. Defaults to -1.
+        Returns:
+            regions (List[Region]): The sub-regions, in page coordinates
+        """
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        return [
+            Region(self.x + x, self.y + y, w, h, self.page, parent, self.transform)
+            for x, y, w, h in boxes.tolist()
+        ]
+
+    def __repr__(self) -> str:
+        return f"Region(x={self.x}, y={self.y}, w={self.w}, h={self.h}, parent={self.parent})"
@@ -5,6 +5,9 @@ from .core import (
     AdaptiveMeanThresholding,
     AdaptiveGaussianThresholding,
     OtsuThresholding,
+    MultiOtsuThresholding,
+    SauvolaThresholding,
+    NiblackThresholding,
 )
 
 __all__ = [
@@ -16,4 +19,7 @@ __all__ = [
     "AdaptiveMeanThresholding",
     "AdaptiveGaussianThresholding",
     "OtsuThresholding",
+    "MultiOtsuThresholding",
+    "SauvolaThresholding",
+    "NiblackThresholding",
 ]
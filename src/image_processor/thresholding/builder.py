@@ -4,6 +4,9 @@ from .core import (
     AdaptiveMeanThresholding,
     AdaptiveGaussianThresholding,
     OtsuThresholding,
+    MultiOtsuThresholding,
+    SauvolaThresholding,
+    NiblackThresholding,
 )
 from src.dtypes import ThresholdingMode, ThresholdingType
 
@@ -35,4 +38,19 @@ class ThresholdingBuilder:
         if type == ThresholdingType.OTSU:
             return OtsuThresholding(mode, max_value)
 
+        if type == ThresholdingType.MULTI_OTSU:
+            classes = kwargs.get("classes", 3)
+            return MultiOtsuThresholding(mode, classes, max_value)
+
+        if type == ThresholdingType.SAUVOLA:
+            block_size = kwargs.get("block_size", 15)
+            k = kwargs.get("k", 0.2)
+            R = kwargs.get("R", 128.0)
+            return SauvolaThresholding(mode, block_size, k, R, max_value)
+
+        if type == ThresholdingType.NIBLACK:
+            block_size = kwargs.get("block_size", 15)
+            k = kwargs.get("k", -0.2)
+            return NiblackThresholding(mode, block_size, k, max_value)
+
         raise ValueError("Invalid thresholding type")
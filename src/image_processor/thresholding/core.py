@@ -1,31 +1,126 @@
 from .interface import IThresholding
 from src.dtypes import ThresholdingMode
-from src.image_processor.filters import GaussianFilter
+from src.image_processor.filters import LinearFilter
+from src.utils import BufferPool, CVMath, KernelGenerator
 
 import numpy as np
-from typing import Callable
+from typing import Optional, Tuple, Union
 
 
 class ThresholdHelper:
     @staticmethod
-    def GetThresFunc(
-        mode: ThresholdingMode, threshold: float, max_value: float
-    ) -> Callable:
+    def Histogram(image: np.ndarray) -> np.ndarray:
         """
-        Returns pixel-wise thresholding function based on the thresholding modes: BINARY, BINARY_INV, TRUNC, TOZERO, TOZERO_INV
+        Computes the 256-bin histogram of an image over [0, 256), meant to be computed once per
+        page and shared by the stages that need it (Otsu, polarity or contrast checks)
+        Args:
+            image (np.ndarray, 2D): The input image
+        Returns:
+            hist (np.ndarray, 1D, int64): The pixel count of every level
+        """
+        if image.dtype == np.uint8:
+            return np.bincount(image.ravel(), minlength=256).astype(np.int64)
+        return np.histogram(image.ravel(), bins=256, range=(0, 256))[0]
+
+    @staticmethod
+    def LocalStats(
+        image: np.ndarray, block_size: int, pool: Optional[BufferPool] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the local mean and standard deviation over every block_size x block_size
+        neighborhood from summed-area tables of the values and of their squares, so the cost
+        does not depend on the block size. Borders are reflected (BORDER_REFLECT_101).
+        Args:
+            image (np.ndarray, 2D): The input image
+            block_size (int): The size of the square neighborhood
+            pool (BufferPool, optional): Pool to draw the mean and deviation maps from
+        Returns:
+            mean (np.ndarray, 2D, float64): The local means
+            std (np.ndarray, 2D, float64): The local standard deviations
+        """
+        area = block_size * block_size
+        mean = BufferPool.Scratch(pool, image.shape, np.float64, "local_mean")
+        var = BufferPool.Scratch(pool, image.shape, np.float64, "local_var")
+        CVMath.BoxSum(image, block_size, out=mean)
+        mean /= area
+        CVMath.BoxSum(image, block_size, squared=True, out=var)
+        var /= area
+        var -= mean * mean
+        # Cancellation in E[x^2] - E[x]^2 can leave tiny negative variances
+        np.maximum(var, 0.0, out=var)
+        return mean, np.sqrt(var, out=var)
+
+    @staticmethod
+    def Apply(
+        image: np.ndarray,
+        mode: ThresholdingMode,
+        threshold: Union[float, np.ndarray],
+        max_value: float,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """
+        Applies a thresholding mode to a whole image at once: BINARY, BINARY_INV, TRUNC, TOZERO or
+        TOZERO_INV against the threshold, followed by clipping to [0, max_value] and casting to uint8
+        Args:
+            image (np.ndarray, 2D): Input image to be thresholded
+            mode (ThresholdingMode): The thresholding mode
+            threshold (float | np.ndarray): A global threshold, or one threshold per pixel
+            max_value (float): The maximum pixel value
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into
+            pool (BufferPool, optional): Pool to draw the float32 intermediate from
+        Returns:
+            image (np.ndarray, 2D, uint8): The thresholded image
         """
+        if out is None:
+            out = np.empty(image.shape, dtype=np.uint8)
+
+        # A global threshold on uint8 pixels reduces to a 256-entry lookup table
+        if image.dtype == np.uint8 and np.ndim(threshold) == 0:
+            levels = np.arange(256, dtype=np.uint8)
+            lut = ThresholdHelper._Threshold(
+                levels, mode, threshold, max_value, np.empty_like(levels)
+            )
+            return np.take(lut, image, out=out)
+
+        result = BufferPool.Scratch(pool, image.shape, np.float32, "threshold")
+        return ThresholdHelper._Threshold(
+            image, mode, threshold, max_value, out, result
+        )
+
+    @staticmethod
+    def _Threshold(
+        image: np.ndarray,
+        mode: ThresholdingMode,
+        threshold: Union[float, np.ndarray],
+        max_value: float,
+        out: np.ndarray,
+        result: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        above = image > threshold
+        if result is None:
+            result = np.empty(image.shape, dtype=np.float32)
         if mode == ThresholdingMode.BINARY:
-            return lambda pixel: max_value if pixel > threshold else 0
-        if mode == ThresholdingMode.BINARY_INV:
-            return lambda pixel: 0 if pixel > threshold else max_value
-        if mode == ThresholdingMode.TRUNC:
-            return lambda pixel: threshold if pixel > threshold else pixel
-        if mode == ThresholdingMode.TOZERO:
-            return lambda pixel: 0 if pixel > threshold else pixel
-        if mode == ThresholdingMode.TOZERO_INV:
-            return lambda pixel: pixel if pixel > threshold else 0
+            result.fill(0)
+            result[above] = max_value
+        elif mode == ThresholdingMode.BINARY_INV:
+            result.fill(max_value)
+            result[above] = 0
+        elif mode == ThresholdingMode.TRUNC:
+            np.copyto(result, image, casting="unsafe")
+            np.copyto(result, threshold, casting="unsafe", where=above)
+        elif mode == ThresholdingMode.TOZERO:
+            np.copyto(result, image, casting="unsafe")
+            result[above] = 0
+        elif mode == ThresholdingMode.TOZERO_INV:
+            np.copyto(result, image, casting="unsafe")
+            result[~above] = 0
+        else:
+            raise ValueError(f"Unsupported thresholding mode: {mode}")
 
-        raise ValueError(f"Unsupported thresholding mode: {mode}")
+        np.clip(result, 0, max_value, out=result)
+        np.copyto(out, result, casting="unsafe")
+        return out
 
 
 class GlobalThresholding(IThresholding):
@@ -42,22 +137,25 @@ class GlobalThresholding(IThresholding):
         self.mode = mode
         self.threshold = threshold
         self.max_value = max_value
-        self.thres_func = ThresholdHelper.GetThresFunc(mode, threshold, max_value)
 
-    def ApplyThresholding(self, image: np.ndarray) -> np.ndarray:
+    def ApplyThresholding(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
         """
         Apply global thresholding to an image
         Args:
             image (np.ndarray, 2D): Input image to be thresholded
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
             image (np.ndarray, 2D): Output image after applying the global thresholding
         """
-        result = np.zeros_like(image, dtype=np.float32)
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                result[i, j] = self.thres_func(image[i, j])
-
-        return np.clip(result, 0, self.max_value).astype(np.uint8)
+        return ThresholdHelper.Apply(
+            image, self.mode, self.threshold, self.max_value, out, pool
+        )
 
 
 class AdaptiveMeanThresholding(IThresholding):
@@ -82,28 +180,29 @@ class AdaptiveMeanThresholding(IThresholding):
         self.block_size = block_size
         self.C = C
 
-    def ApplyThresholding(self, image: np.ndarray) -> np.ndarray:
+    def ApplyThresholding(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
         """
-        Apply adaptive mean thresholding to an image
+        Apply adaptive mean thresholding to an image. Local means over the reflected
+        block_size x block_size neighborhood come from a summed-area table (O(1) per pixel).
         Args:
             image (np.ndarray, 2D): Input image to be thresholded
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
             image (np.ndarray, 2D): Output image after applying the adaptive mean thresholding
         """
-        pad = self.block_size // 2
-        padded = np.pad(image, pad, mode="reflect")
-        result = np.zeros_like(image, dtype=np.float32)
-
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                region = padded[i : i + self.block_size, j : j + self.block_size]
-                local_thresh = np.mean(region) - self.C
-                thres_func = ThresholdHelper.GetThresFunc(
-                    self.mode, local_thresh, self.max_value
-                )
-                result[i, j] = thres_func(image[i, j])
-
-        return np.clip(result, 0, self.max_value).astype(np.uint8)
+        local_thresh = BufferPool.Scratch(pool, image.shape, np.float64, "local_mean")
+        CVMath.BoxSum(image, self.block_size, out=local_thresh)
+        local_thresh /= self.block_size * self.block_size
+        local_thresh -= self.C
+        return ThresholdHelper.Apply(
+            image, self.mode, local_thresh, self.max_value, out, pool
+        )
 
 
 class AdaptiveGaussianThresholding(IThresholding):
@@ -129,33 +228,36 @@ class AdaptiveGaussianThresholding(IThresholding):
         self.max_value = max_value
         self.block_size = block_size
         self.sigma = sigma
-        self.gaussian_kernel = GaussianFilter(
-            sigma=sigma, kernel_size=self.block_size
-        ).kernel
+        self.gaussian_kernel = KernelGenerator.GetGaussianKernel(
+            sigma, self.block_size + (1 - self.block_size % 2)
+        )
+        self.gaussian = LinearFilter(self.gaussian_kernel)
         self.C = C
 
-    def ApplyThresholding(self, image: np.ndarray) -> np.ndarray:
+    def ApplyThresholding(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
         """
-        Apply adaptive Gaussian thresholding to an image
+        Apply adaptive Gaussian thresholding to an image. Local weighted means over the reflected
+        neighborhood come from one full-image (separable) convolution with the Gaussian kernel.
         Args:
             image (np.ndarray, 2D): Input image to be thresholded
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into
+            pool (BufferPool, optional): Pool to draw scratch buffers from
         Returns:
             image (np.ndarray, 2D): Output image after applying the adaptive Gaussian thresholding
         """
-        pad = self.block_size // 2
-        padded = np.pad(image, pad, mode="reflect")
-        result = np.zeros_like(image, dtype=np.float32)
-
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                region = padded[i : i + self.block_size, j : j + self.block_size]
-                local_thresh = np.sum(region * self.gaussian_kernel) - self.C
-                thres_func = ThresholdHelper.GetThresFunc(
-                    self.mode, local_thresh, self.max_value
-                )
-                result[i, j] = thres_func(image[i, j])
-
-        return np.clip(result, 0, self.max_value).astype(np.uint8)
+        pixels = BufferPool.Scratch(pool, image.shape, np.float64, "threshold_input")
+        np.copyto(pixels, image, casting="unsafe")
+        local_thresh = BufferPool.Scratch(pool, image.shape, np.float64, "local_mean")
+        local_thresh = self.gaussian.Filter(pixels, local_thresh)
+        local_thresh -= self.C
+        return ThresholdHelper.Apply(
+            image, self.mode, local_thresh, self.max_value, out, pool
+        )
 
 
 class OtsuThresholding(IThresholding):
@@ -169,40 +271,264 @@ class OtsuThresholding(IThresholding):
         self.mode = mode
         self.max_value = max_value
 
-    def ApplyThresholding(self, image: np.ndarray) -> np.ndarray:
+    @staticmethod
+    def ComputeThreshold(hist: np.ndarray) -> int:
         """
-        Apply Otsu thresholding to an image by computing the histogram and finding the threshold that maximizes the between-class variance
+        Finds the threshold that maximizes the between-class variance of a 256-bin histogram,
+        evaluating every candidate at once from cumulative sums
         Args:
-            image (np.ndarray, 2D): Input image to be thresholded
+            hist (np.ndarray, 1D): The 256-bin histogram, e.g. from ThresholdHelper.Histogram
         Returns:
-            image (np.ndarray, 2D): Output image after applying the Otsu thresholding
+            threshold (int): The Otsu threshold (pixels above it form the foreground class)
         """
-        hist, _ = np.histogram(image.ravel(), bins=256, range=(0, 256))
-        total = image.size
-        sum_total = np.sum(np.arange(256) * hist)
-        sumB, wB, max_var, threshold = 0.0, 0, 0.0, 0.0
-
-        for t in range(256):
-            wB += hist[t]
-            if wB == 0:
-                continue
-            wF = total - wB
-            if wF == 0:
-                break
-            sumB += t * hist[t]
+        hist = np.asarray(hist, dtype=np.int64)
+        levels = np.arange(hist.size)
+        wB = np.cumsum(hist)
+        wF = wB[-1] - wB
+        sumB = np.cumsum(levels * hist).astype(np.float64)
+        sum_total = sumB[-1]
+
+        valid = (wB > 0) & (wF > 0)
+        if not np.any(valid):
+            return 0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
             mB = sumB / wB
             mF = (sum_total - sumB) / wF
             var_between = wB * wF * (mB - mF) ** 2
-            if var_between > max_var:
-                max_var = var_between
-                threshold = t
+        var_between[~valid] = 0.0
 
-        threshold_func = ThresholdHelper.GetThresFunc(
-            self.mode, threshold, self.max_value
+        threshold = int(np.argmax(var_between))
+        return threshold if var_between[threshold] > 0 else 0
+
+    def ApplyThresholding(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+        hist: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Apply Otsu thresholding to an image by computing the histogram and finding the threshold that maximizes the between-class variance
+        Args:
+            image (np.ndarray, 2D): Input image to be thresholded
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+            hist (np.ndarray, 1D, optional): Precomputed 256-bin histogram of the image, to be reused
+        Returns:
+            image (np.ndarray, 2D): Output image after applying the Otsu thresholding
+        """
+        if hist is None:
+            hist = ThresholdHelper.Histogram(image)
+        threshold = OtsuThresholding.ComputeThreshold(hist)
+        return ThresholdHelper.Apply(
+            image, self.mode, threshold, self.max_value, out, pool
         )
-        result = np.zeros_like(image, dtype=np.float32)
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                result[i, j] = threshold_func(image[i, j])
 
-        return np.clip(result, 0, self.max_value).astype(np.uint8)
+
+class MultiOtsuThresholding(IThresholding):
+    def __init__(
+        self, mode: ThresholdingMode, classes: int = 3, max_value: float = 255.0
+    ):
+        """
+        Constructor for MultiOtsuThresholding class
+        Args:
+            mode (ThresholdingMode): The thresholding mode, BINARY (dark to bright levels) or BINARY_INV
+            classes (int, optional): Number of classes, 3 or 4 (2 or 3 thresholds). Defaults to 3.
+            max_value (float, optional): The maximum pixel value. Defaults to 255.
+        """
+        if classes not in (3, 4):
+            raise ValueError("Multi-level Otsu supports 3 or 4 classes")
+        if mode not in (ThresholdingMode.BINARY, ThresholdingMode.BINARY_INV):
+            raise ValueError(f"Unsupported thresholding mode: {mode}")
+
+        self.mode = mode
+        self.classes = classes
+        self.max_value = max_value
+
+    @staticmethod
+    def VarianceTable(hist: np.ndarray) -> np.ndarray:
+        """
+        Precomputes the lookup table H[u, v] = S(u, v)^2 / P(u, v) of the class spanning levels u..v,
+        where P and S are the zeroth and first moments of the normalized histogram over that range
+        Args:
+            hist (np.ndarray, 1D): The 256-bin histogram
+        Returns:
+            table (np.ndarray, 2D): The (256, 256) table, zero where u > v or the class is empty
+        """
+        p = np.asarray(hist, dtype=np.float64)
+        p = p / max(p.sum(), 1.0)
+        P = np.concatenate(([0.0], np.cumsum(p)))
+        S = np.concatenate(([0.0], np.cumsum(np.arange(p.size) * p)))
+
+        weight = P[None, 1:] - P[:-1, None]
+        moment = S[None, 1:] - S[:-1, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            table = np.where(weight > 0, moment**2 / weight, 0.0)
+        return np.triu(table)
+
+    def ComputeThresholds(self, hist: np.ndarray) -> np.ndarray:
+        """
+        Finds the thresholds that maximize the between-class variance of a 256-bin histogram
+        using the precomputed class variance lookup table
+        Args:
+            hist (np.ndarray, 1D): The 256-bin histogram, e.g. from ThresholdHelper.Histogram
+        Returns:
+            thresholds (np.ndarray, 1D): The classes - 1 ascending thresholds
+        """
+        H = MultiOtsuThresholding.VarianceTable(hist)
+        L = H.shape[0]
+        first = H[0]  # class 0..t1
+        last = np.append(H[1:, -1], 0.0)  # class t+1..L-1
+        # middle[a, b]: class a+1..b
+        middle = np.zeros_like(H)
+        middle[:-1] = H[1:]
+        upper = np.triu(np.ones((L, L), dtype=bool), k=1)
+
+        if self.classes == 3:
+            score = np.where(upper, first[:, None] + middle + last[None, :], -np.inf)
+            t1, t2 = np.unravel_index(np.argmax(score), score.shape)
+            return np.array([t1, t2])
+
+        best, thresholds = -np.inf, np.array([0, 1, 2])
+        for t1 in range(L - 2):
+            score = np.where(
+                upper, first[t1] + middle[t1][:, None] + middle + last[None, :], -np.inf
+            )
+            score[: t1 + 1] = -np.inf
+            idx = np.argmax(score)
+            if score.flat[idx] > best:
+                best = score.flat[idx]
+                t2, t3 = np.unravel_index(idx, score.shape)
+                thresholds = np.array([t1, t2, t3])
+        return thresholds
+
+    def ApplyThresholding(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+        hist: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Apply multi-level Otsu thresholding, mapping each class to evenly spaced levels in [0, max_value]
+        Args:
+            image (np.ndarray, 2D): Input image to be thresholded
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+            hist (np.ndarray, 1D, optional): Precomputed 256-bin histogram of the image, to be reused
+        Returns:
+            image (np.ndarray, 2D): Output image with one gray level per class
+        """
+        if hist is None:
+            hist = ThresholdHelper.Histogram(image)
+        thresholds = self.ComputeThresholds(hist)
+
+        levels = np.linspace(0, self.max_value, self.classes)
+        if self.mode == ThresholdingMode.BINARY_INV:
+            levels = levels[::-1]
+        levels = np.clip(levels, 0, 255).astype(np.uint8)
+
+        if out is None:
+            out = np.empty(image.shape, dtype=np.uint8)
+        # A pixel belongs to the class after every threshold it exceeds
+        if image.dtype == np.uint8:
+            lut = levels[np.searchsorted(thresholds, np.arange(256), side="left")]
+            return np.take(lut, image, out=out)
+        return np.take(levels, np.searchsorted(thresholds, image, side="left"), out=out)
+
+
+class SauvolaThresholding(IThresholding):
+    def __init__(
+        self,
+        mode: ThresholdingMode,
+        block_size: int = 15,
+        k: float = 0.2,
+        R: float = 128.0,
+        max_value: float = 255.0,
+    ):
+        """
+        Constructor for SauvolaThresholding class
+        Args:
+            mode (ThresholdingMode): The thresholding mode
+            block_size (int, optional): The neighborhood size. Defaults to 15.
+            k (float, optional): Sensitivity to the local contrast. Defaults to 0.2.
+            R (float, optional): The dynamic range of the standard deviation. Defaults to 128.
+            max_value (float, optional): The maximum pixel value. Defaults to 255.
+        """
+        self.mode = mode
+        self.block_size = block_size
+        self.k = k
+        self.R = R
+        self.max_value = max_value
+
+    def ApplyThresholding(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """
+        Apply Sauvola thresholding to an image, with the local threshold T = m * (1 + k * (s / R - 1))
+        where m and s are the local mean and standard deviation
+        Args:
+            image (np.ndarray, 2D): Input image to be thresholded
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+        Returns:
+            image (np.ndarray, 2D): Output image after applying the Sauvola thresholding
+        """
+        mean, std = ThresholdHelper.LocalStats(image, self.block_size, pool)
+        std /= self.R
+        std -= 1.0
+        std *= self.k
+        std += 1.0
+        local_thresh = np.multiply(mean, std, out=mean)
+        return ThresholdHelper.Apply(
+            image, self.mode, local_thresh, self.max_value, out, pool
+        )
+
+
+class NiblackThresholding(IThresholding):
+    def __init__(
+        self,
+        mode: ThresholdingMode,
+        block_size: int = 15,
+        k: float = -0.2,
+        max_value: float = 255.0,
+    ):
+        """
+        Constructor for NiblackThresholding class
+        Args:
+            mode (ThresholdingMode): The thresholding mode
+            block_size (int, optional): The neighborhood size. Defaults to 15.
+            k (float, optional): Weight of the local standard deviation, negative for dark text. Defaults to -0.2.
+            max_value (float, optional): The maximum pixel value. Defaults to 255.
+        """
+        self.mode = mode
+        self.block_size = block_size
+        self.k = k
+        self.max_value = max_value
+
+    def ApplyThresholding(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        pool: Optional[BufferPool] = None,
+    ) -> np.ndarray:
+        """
+        Apply Niblack thresholding to an image, with the local threshold T = m + k * s
+        where m and s are the local mean and standard deviation
+        Args:
+            image (np.ndarray, 2D): Input image to be thresholded
+            out (np.ndarray, 2D, uint8, optional): Buffer to write the result into
+            pool (BufferPool, optional): Pool to draw scratch buffers from
+        Returns:
+            image (np.ndarray, 2D): Output image after applying the Niblack thresholding
+        """
+        mean, std = ThresholdHelper.LocalStats(image, self.block_size, pool)
+        std *= self.k
+        local_thresh = np.add(mean, std, out=mean)
+        return ThresholdHelper.Apply(
+            image, self.mode, local_thresh, self.max_value, out, pool
+        )
@@ -1,5 +1,11 @@
 from .core import RookieOCR
+from .preprocess import CharPreprocessor
+from .scheduler import MicroBatchScheduler
+from .numpy_engine import NumpyCNN
 
 __all__ = [
     "RookieOCR",
+    "CharPreprocessor",
+    "MicroBatchScheduler",
+    "NumpyCNN",
 ]
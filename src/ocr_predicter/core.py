@@ -1,19 +1,58 @@
 from src.utils.converter import ConverterUtil
 from src.image_processor.interpolator import *
 from src.dtypes.interpolation import InterpolationOperationType 
+from .preprocess import CharPreprocessor
+from .numpy_engine import NumpyCNN
 
+import importlib.util
 import os
 import numpy as np
 import cv2
 from matplotlib import pyplot as plt
-from tensorflow.keras.models import load_model
 
 class RookieOCR:
-    def __init__(self,model_path):
-        self.model = load_model(model_path)
+    def __init__(self,model_path,max_batch_size=256,debug_hook=None,backend="auto"):
+        """
+        Args:
+            model_path (str): Path of the Keras model (or its .npz conversion), input (18,12,1) and 62 class scores.
+            max_batch_size (int): Most characters per forward pass, larger inputs are split.
+            debug_hook (callable, optional): Called as debug_hook(idx, sample_name, char) for every
+                recognized character, e.g. RookieOCR.print_prediction.
+            backend (str): "keras", "numpy" or "auto", see load_backend.
+        """
+        if max_batch_size < 1:
+            raise ValueError("Maximum batch size must be positive")
+        self.model = self.load_backend(model_path, backend)
         self.label_map = sorted(
             [f"Sample{i:03d}" for i in range(1,63)]
         )
+        # Class index → character, decoded once instead of per prediction
+        self.charset = np.array([self.decode_sample_label(name) for name in self.label_map])
+        self.preprocessor = CharPreprocessor(size=(12, 18))
+        self.max_batch_size = max_batch_size
+        self.debug_hook = debug_hook
+
+    @staticmethod
+    def load_backend(model_path,backend="auto"):
+        """
+        Loads the model for inference.
+        Args:
+            model_path (str): Path of the .h5 model or its .npz conversion.
+            backend (str): "keras" (TensorFlow), "numpy" (NumpyCNN, no TensorFlow needed) or "auto":
+                NumPy for .npz files or when TensorFlow is not installed, Keras otherwise.
+        Returns:
+            A model exposing predict_on_batch.
+        """
+        if backend == "auto":
+            use_numpy = str(model_path).endswith(".npz") or importlib.util.find_spec("tensorflow") is None
+            backend = "numpy" if use_numpy else "keras"
+        if backend == "numpy":
+            return NumpyCNN.load(model_path)
+        if backend == "keras":
+            # Imported here: TensorFlow takes seconds to import and is only needed for this backend
+            from tensorflow.keras.models import load_model
+            return load_model(model_path)
+        raise ValueError(f"Invalid backend: {backend}")
 
     def decode_sample_label(self,sample_name):
         idx = int(sample_name[-3:])
@@ -26,29 +65,63 @@ class RookieOCR:
         else:
             return '?'
 
+    @staticmethod
+    def print_prediction(idx, sample_name, char):
+        """
+        Debug hook printing one line per character.
+        """
+        print(f"Char {idx}: Pred={sample_name} → '{char}'")
+
+    def predict_indices(self,batch):
+        """
+        Classifies a preprocessed (N,18,12,1) batch, max_batch_size characters per forward pass.
+        Returns:
+            np.ndarray: The class index of every character.
+        """
+        indices = np.empty(len(batch), dtype=np.int64)
+        for start in range(0, len(batch), self.max_batch_size):
+            chunk = batch[start:start + self.max_batch_size]
+            scores = np.asarray(self.model.predict_on_batch(chunk))
+            indices[start:start + len(chunk)] = np.argmax(scores, axis=1)
+        return indices
+
+    def recognize(self,chars):
+        """
+        Recognizes characters (of a word, a line or a whole page) in batched forward passes.
+        Args:
+            chars (list): Character crops, 2D arrays or Regions.
+        Returns:
+            list[str]: The recognized characters.
+        """
+        if len(chars) == 0:
+            return []
+        # Inverted, resized to the model input (18×12) and scaled to [0, 1] in one batch
+        batch = self.preprocessor.prepare(chars)  # shape (N,18,12,1)
+        return self.decode(self.predict_indices(batch))
+
+    def decode(self,indices):
+        """
+        Maps class indices to characters, reporting each one to the debug hook if set.
+        Returns:
+            list[str]: The characters.
+        """
+        decoded = self.charset[indices].tolist()
+        if self.debug_hook is not None:
+            for idx, (pred_idx, char) in enumerate(zip(indices, decoded)):
+                self.debug_hook(idx, self.label_map[pred_idx], char)
+        return decoded
+
+    def recognize_words(self,words):
+        """
+        Recognizes several words with the characters of all of them batched together.
+        Args:
+            words (list[list]): The character crops of every word.
+        Returns:
+            list[str]: The recognized words.
+        """
+        decoded = self.recognize([ch for word in words for ch in word])
+        bounds = np.cumsum([0] + [len(word) for word in words]).tolist()
+        return ["".join(decoded[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
     def recognize_word(self,chars):
-        recognized = ""
-        for idx, ch in enumerate(chars):
-            # Ensure grayscale 2D numpy array
-            if isinstance(ch, np.ndarray) and ch.ndim == 3:
-                ch = cv2.cvtColor(ch, cv2.COLOR_BGR2GRAY)
-            # Invert and resize to match model input (18×12)
-            ch = ConverterUtil.ToInverted(ch)
-            img = InterpolatorBuilder.Build(InterpolationOperationType.RESIZE, target_size = (12,18)).Interpolate(ch)
-            # cv2.resize(ch, (12, 18))
-            img = np.expand_dims(img, axis=(0, -1))  # shape (1,18,12,1)
-            img = img.astype("float32") / 255.0
-            # Predict
-            pred = self.model.predict(img, verbose=0)
-            pred_idx = np.argmax(pred)
-            # Decode using label_map → readable char
-            sample_name = self.label_map[pred_idx]
-            decoded_char = self.decode_sample_label(sample_name)
-            recognized += decoded_char
-            print(f"Char {idx}: Pred={sample_name} → '{decoded_char}'")
-            # Optional visualization
-            # plt.imshow(ch, cmap='gray')
-            # plt.title(f"Predicted: {decoded_char}")
-            # plt.axis('off')
-            # plt.show()
-        return recognized
\ No newline at end of file
+        return "".join(self.recognize(chars))
@@ -0,0 +1,201 @@
+import json
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class NumpyCNN:
+    """
+    Inference-only NumPy version of a Keras Sequential CNN (Conv2D, MaxPooling2D, Flatten,
+    Dense, Dropout, Activation), loaded from the Keras .h5 file (needs h5py, not TensorFlow)
+    or from an .npz written by save_npz. Convolutions run as im2col + one GEMM per layer on
+    channels-last float32 batches, so outputs match Keras up to float32 rounding.
+    """
+
+    ACTIVATIONS = {
+        "linear": lambda x: x,
+        "relu": lambda x: np.maximum(x, 0, out=x),
+        "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+        "tanh": np.tanh,
+        "softmax": lambda x: NumpyCNN.softmax(x),
+    }
+
+    def __init__(self, layers, weights):
+        """
+        Args:
+            layers (list[dict]): Keras layer descriptions, {"class_name": ..., "config": {...}}.
+            weights (list[list[np.ndarray]]): The weights of every layer, kernel then bias.
+        """
+        if len(layers) != len(weights):
+            raise ValueError("Every layer needs its (possibly empty) list of weights")
+        self.layers = layers
+        self.weights = [[np.asarray(w, dtype=np.float32) for w in ws] for ws in weights]
+        self.steps = [self._step(layer, ws) for layer, ws in zip(self.layers, self.weights)]
+
+    @staticmethod
+    def load(path):
+        """
+        Loads a model from a Keras .h5 file or a converted .npz file.
+        """
+        if str(path).endswith(".npz"):
+            return NumpyCNN.from_npz(path)
+        return NumpyCNN.from_h5(path)
+
+    @staticmethod
+    def from_h5(path):
+        """
+        Reads the architecture and weights of a Keras (2 or 3) Sequential model saved as .h5.
+        """
+        import h5py
+
+        with h5py.File(path, "r") as f:
+            config = f.attrs["model_config"]
+            config = json.loads(config.decode() if isinstance(config, bytes) else config)
+            layers = [layer for layer in config["config"]["layers"]
+                      if layer["class_name"] != "InputLayer"]
+            group = f["model_weights"] if "model_weights" in f else f
+            weights = []
+            for layer in layers:
+                g = group[layer["config"]["name"]]
+                names = [n.decode() if isinstance(n, bytes) else n
+                         for n in g.attrs.get("weight_names", [])]
+                weights.append([g[name][()] for name in names])
+        return NumpyCNN(layers, weights)
+
+    @staticmethod
+    def from_npz(path):
+        """
+        Reads a model written by save_npz.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            layers = json.loads(str(data["layers"]))
+            weights = [[data[f"{i}/{j}"] for j in range(int(data[f"{i}/count"]))]
+                       for i in range(len(layers))]
+        return NumpyCNN(layers, weights)
+
+    def save_npz(self, path):
+        """
+        Writes the architecture and weights to a single .npz file (no pickled objects).
+        """
+        arrays = {"layers": np.array(json.dumps(self.layers))}
+        for i, ws in enumerate(self.weights):
+            arrays[f"{i}/count"] = np.array(len(ws))
+            for j, w in enumerate(ws):
+                arrays[f"{i}/{j}"] = w
+        np.savez(path, **arrays)
+
+    def predict_on_batch(self, x):
+        """
+        Runs a forward pass over a (N, height, width, channels) batch.
+        Returns:
+            np.ndarray: The outputs of the last layer, e.g. (N, classes) probabilities.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        for step in self.steps:
+            x = step(x)
+        return x
+
+    def predict(self, x, batch_size=256, verbose=0):
+        """
+        Keras-style predict: forward passes of at most batch_size samples.
+        """
+        parts = [self.predict_on_batch(x[i:i + batch_size]) for i in range(0, len(x), batch_size)]
+        return np.concatenate(parts) if parts else np.empty((0,), dtype=np.float32)
+
+    @staticmethod
+    def softmax(x):
+        x = x - x.max(axis=-1, keepdims=True)
+        np.exp(x, out=x)
+        x /= x.sum(axis=-1, keepdims=True)
+        return x
+
+    def _step(self, layer, ws):
+        kind, config = layer["class_name"], layer["config"]
+        if config.get("data_format", "channels_last") != "channels_last":
+            raise ValueError(f"Layer {config['name']}: only channels_last is supported")
+
+        if kind == "Conv2D":
+            if tuple(config.get("dilation_rate", (1, 1))) != (1, 1) or config.get("groups", 1) != 1:
+                raise ValueError(f"Layer {config['name']}: dilated and grouped convolutions are not supported")
+            kernel = ws[0]
+            kh, kw, c, n = kernel.shape
+            gemm = kernel.reshape(kh * kw * c, n)
+            bias = ws[1] if len(ws) > 1 else None
+            strides = tuple(config.get("strides", (1, 1)))
+            padding = config.get("padding", "valid")
+            activation = self._activation(config)
+            return lambda x: activation(self._conv(x, gemm, bias, (kh, kw), strides, padding))
+
+        if kind == "MaxPooling2D":
+            pool = tuple(config["pool_size"])
+            strides = tuple(config.get("strides") or pool)
+            padding = config.get("padding", "valid")
+            return lambda x: self._max_pool(x, pool, strides, padding)
+
+        if kind == "Dense":
+            kernel = ws[0]
+            bias = ws[1] if len(ws) > 1 else None
+            activation = self._activation(config)
+
+            def dense(x):
+                y = x @ kernel
+                if bias is not None:
+                    y += bias
+                return activation(y)
+            return dense
+
+        if kind == "Flatten":
+            return lambda x: x.reshape(len(x), -1)
+        if kind == "Activation":
+            return self._activation(config)
+        if kind == "Dropout":
+            return lambda x: x
+        raise ValueError(f"Unsupported layer type: {kind}")
+
+    def _activation(self, config):
+        name = config.get("activation", "linear")
+        if not isinstance(name, str) or name not in self.ACTIVATIONS:
+            raise ValueError(f"Unsupported activation: {name}")
+        return self.ACTIVATIONS[name]
+
+    @staticmethod
+    def _pad_same(x, window, strides, value):
+        """
+        Pads height and width like TensorFlow's "same" padding (extra row/column at the end).
+        """
+        pads = [(0, 0)]
+        for size, k, s in zip(x.shape[1:3], window, strides):
+            total = max((-(-size // s) - 1) * s + k - size, 0)
+            pads.append((total // 2, total - total // 2))
+        pads.append((0, 0))
+        return np.pad(x, pads, constant_values=value)
+
+    @staticmethod
+    def _conv(x, gemm, bias, window, strides, padding):
+        if padding == "same":
+            x = NumpyCNN._pad_same(x, window, strides, 0)
+        elif padding != "valid":
+            raise ValueError(f"Unsupported padding: {padding}")
+        kh, kw = window
+        # im2col: (N, Ho, Wo, C, kh, kw) windows, reordered to the kernel's (kh, kw, C) rows
+        patches = sliding_window_view(x, window, axis=(1, 2))[:, ::strides[0], ::strides[1]]
+        n, ho, wo, c = patches.shape[:4]
+        cols = np.ascontiguousarray(patches.transpose(0, 1, 2, 4, 5, 3)).reshape(n * ho * wo, kh * kw * c)
+        y = cols @ gemm
+        if bias is not None:
+            y += bias
+        return y.reshape(n, ho, wo, -1)
+
+    @staticmethod
+    def _max_pool(x, pool, strides, padding):
+        if padding == "same":
+            x = NumpyCNN._pad_same(x, pool, strides, -np.inf)
+        elif padding != "valid":
+            raise ValueError(f"Unsupported padding: {padding}")
+        if pool == strides:
+            n, h, w, c = x.shape
+            ho, wo = h // pool[0], w // pool[1]
+            x = x[:, :ho * pool[0], :wo * pool[1]].reshape(n, ho, pool[0], wo, pool[1], c)
+            return x.max(axis=(2, 4))
+        windows = sliding_window_view(x, pool, axis=(1, 2))[:, ::strides[0], ::strides[1]]
+        return windows.max(axis=(-2, -1))
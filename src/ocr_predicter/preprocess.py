@@ -0,0 +1,81 @@
+from src.image_processor.interpolator.core import InterpolationHelper
+from src.image_processor.segmentation import Region
+
+import numpy as np
+import cv2
+
+
+class CharPreprocessor:
+    """
+    Turns character crops into the model input tensor in one go: every crop is resized into a
+    uint8 canvas reused across the call and mapped through a 256-entry table that inverts and
+    normalizes it, straight into its slot of a preallocated (N, height, width, 1) float32 batch.
+    """
+
+    def __init__(self, size=(12, 18), letterbox=False, pad_value=0,
+                 interpolation=cv2.INTER_LINEAR):
+        """
+        Args:
+            size (tuple[int, int]): Model input size (width, height).
+            letterbox (bool): Keep the aspect ratio of the crops, centering them on a pad_value canvas.
+            pad_value (int): Canvas value of the letterbox, in the crop's (not inverted) gray levels.
+            interpolation (int): OpenCV interpolation method of the resize.
+        """
+        self.size = size
+        self.letterbox = letterbox
+        self.pad_value = pad_value
+        self.interpolation = interpolation
+        # (255 - v) / 255: the inversion and scaling of the model input
+        self.lut = (255 - np.arange(256, dtype=np.float32)) / np.float32(255)
+
+    def allocate(self, n):
+        """
+        Returns an uninitialized batch for n characters, shape (n, height, width, 1).
+        """
+        return np.empty((n, self.size[1], self.size[0], 1), dtype=np.float32)
+
+    def prepare(self, chars, out=None):
+        """
+        Normalizes a list of crops (2D gray or 3-channel BGR arrays, or Regions) into one batch.
+        Args:
+            chars (list): The character crops.
+            out (np.ndarray, optional): Batch of shape (len(chars), height, width, 1) to fill.
+        Returns:
+            np.ndarray: The float32 batch, 1.0 for background and 0.0 for full ink.
+        """
+        if out is None:
+            out = self.allocate(len(chars))
+        elif out.shape != (len(chars), self.size[1], self.size[0], 1) or out.dtype != np.float32:
+            raise ValueError(f"Output batch of shape {out.shape} does not fit {len(chars)} characters")
+
+        # One canvas per call, so concurrent callers can share the preprocessor
+        canvas = np.empty((self.size[1], self.size[0]), dtype=np.uint8)
+        for i, ch in enumerate(chars):
+            np.take(self.lut, self.resize(ch, canvas), out=out[i, :, :, 0])
+        return out
+
+    def resize(self, ch, canvas):
+        """
+        Resizes one crop into a (height, width) uint8 canvas, letterboxed if enabled, and returns it.
+        """
+        if isinstance(ch, Region):
+            ch = ch.view
+        if ch.ndim == 3:
+            ch = cv2.cvtColor(ch, cv2.COLOR_BGR2GRAY)
+        if ch.dtype != np.uint8:
+            ch = np.clip(ch, 0, 255).astype(np.uint8)
+
+        W, H = self.size
+        if ch.size == 0:
+            canvas.fill(self.pad_value)
+            return canvas
+        if not self.letterbox:
+            return InterpolationHelper.Resize(ch, self.size, self.interpolation, canvas)
+
+        h, w = ch.shape
+        scale = min(W / w, H / h)
+        fw, fh = max(1, min(W, round(w * scale))), max(1, min(H, round(h * scale)))
+        x0, y0 = (W - fw) // 2, (H - fh) // 2
+        canvas.fill(self.pad_value)
+        canvas[y0:y0 + fh, x0:x0 + fw] = cv2.resize(ch, (fw, fh), interpolation=self.interpolation)
+        return canvas
@@ -0,0 +1,119 @@
+from concurrent.futures import Future
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class MicroBatchScheduler:
+    """
+    Collects character batches from concurrent callers and runs them through one RookieOCR
+    model together. A worker thread takes the first waiting request, keeps gathering requests
+    until max_batch_size glyphs are queued or max_delay seconds have passed, and classifies them
+    all in one batch; every caller gets its characters back through a Future.
+    """
+
+    def __init__(self, ocr, max_batch_size=256, max_delay=0.005):
+        """
+        Args:
+            ocr (RookieOCR): The recognizer; its preprocessor, model and decoding are shared.
+            max_batch_size (int): Glyph count that flushes the queue without waiting further.
+            max_delay (float): Longest time in seconds a request waits for others to join its batch.
+        """
+        if max_batch_size < 1:
+            raise ValueError("Maximum batch size must be positive")
+        self.ocr = ocr
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.queue = queue.Queue()
+        self.closed = False
+        self.lock = threading.Lock()
+        self.worker = threading.Thread(target=self._run, name="MicroBatchScheduler", daemon=True)
+        self.worker.start()
+
+    def submit(self, chars):
+        """
+        Queues character crops (arrays or Regions) for recognition. They are preprocessed on the
+        calling thread, so only the forward pass is serialized.
+        Returns:
+            Future: Resolves to the list of recognized characters.
+        """
+        future = Future()
+        if len(chars) == 0:
+            future.set_result([])
+            return future
+        batch = self.ocr.preprocessor.prepare(chars)
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Scheduler is closed")
+            self.queue.put((batch, future))
+        return future
+
+    def recognize(self, chars):
+        """
+        Recognizes character crops through the shared batches, blocking until done.
+        Returns:
+            list[str]: The recognized characters.
+        """
+        return self.submit(chars).result()
+
+    def close(self):
+        """
+        Stops accepting requests, finishes the queued ones and stops the worker.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.queue.put(None)
+        self.worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self.queue.get()
+            if item is None:
+                break
+            pending = [item]
+            size = len(item[0])
+            deadline = time.monotonic() + self.max_delay
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                pending.append(item)
+                size += len(item[0])
+            self._flush(pending)
+
+    def _flush(self, pending):
+        pending = [(batch, future) for batch, future in pending
+                   if future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+        try:
+            batch = np.concatenate([batch for batch, _ in pending])
+            indices = self.ocr.predict_indices(batch)
+        except BaseException as exc:
+            for _, future in pending:
+                future.set_exception(exc)
+            return
+
+        start = 0
+        for part, future in pending:
+            try:
+                future.set_result(self.ocr.decode(indices[start:start + len(part)]))
+            except BaseException as exc:
+                future.set_exception(exc)
+            start += len(part)
@@ -7,7 +7,7 @@ from src.ocr_predicter import RookieOCR
 import cv2
 import os
 import numpy as np
-from typing import Any, Dict, Self
+from typing import Any, Dict, Hashable, List, Optional, Self, Tuple
 
 
 class ImageProcessor:
@@ -19,12 +19,35 @@ class ImageProcessor:
         """
         if not os.path.exists(image_path):
             raise FileNotFoundError(f'Image file not found: "{image_path}"')
-        self.image = ColorConverter.ToGrayscale(cv2.imread(image_path))
-        self.lines = []
-        self.words = []
-        self.chars = []
+        # Stages write into two pooled page buffers in turn, so _image is only valid until the
+        # stage after next. Reading image or segmenting detaches the current buffer from the pool.
+        self.pool = BufferPool()
+        self._image = ColorConverter.ToGrayscale(cv2.imread(image_path))
+        # Segments are Regions: page-absolute boxes with lazy views into the pinned page
+        self.lines: List[Region] = []
+        self.words: List[Region] = []
+        self.chars: List[Region] = []
+        self.layout: Optional[Layout] = None
+        # Deskewing transform of a lazy Align, applied to the extracted regions only
+        self.transform: Optional[SkewTransform] = None
+        # Page-level masks of the segmenters' morphological operations, see _Mask
+        self.masks: Dict[Hashable, np.ndarray] = {}
         self.predicted = []
 
+    @property
+    def image(self) -> np.ndarray:
+        """
+        The current image. Stages write their results into reused page buffers; the buffer
+        returned here is detached from the pool first, so the array stays valid (and is not
+        overwritten) whatever stages run afterwards.
+        """
+        self._Detach()
+        return self._image
+
+    @image.setter
+    def image(self, image: np.ndarray) -> None:
+        self._image = image
+
     def Plot(self, title: str = "", cmap: str = "gray") -> Self:
         """
         Plots the image using matplotlib.
@@ -34,7 +57,7 @@ class ImageProcessor:
         Returns:
             self (ImageProcessor): The ImageProcessor object with the plotted image for chaining.
         """
-        Plotter.PlotImage(self.image, title, cmap)
+        Plotter.PlotImage(self._image, title, cmap)
         return self
 
     def PlotSegmentLine(
@@ -61,7 +84,7 @@ class ImageProcessor:
         if index >= len(self.lines):
             raise IndexError("Index out of range")
 
-        Plotter.PlotImage(self.lines[index], title, cmap)
+        Plotter.PlotImage(self.lines[index].view, title, cmap)
         return self
 
     def PlotSegmentWord(
@@ -88,7 +111,7 @@ class ImageProcessor:
         if index >= len(self.words):
             raise IndexError("Index out of range")
 
-        Plotter.PlotImage(self.words[index], title, cmap)
+        Plotter.PlotImage(self.words[index].view, title, cmap)
         return self
 
     def PlotSegmentChar(
@@ -115,7 +138,7 @@ class ImageProcessor:
         if index >= len(self.chars):
             raise IndexError("Index out of range")
 
-        Plotter.PlotImage(self.chars[index], title, cmap)
+        Plotter.PlotImage(self.chars[index].view, title, cmap)
         return self
 
     def Pad(self, padding: int = 0, pad_value: int = 0) -> Self:
@@ -131,7 +154,7 @@ class ImageProcessor:
             raise ValueError("Padding must be non-negative")
 
         if padding > 0:
-            self.image = Padder.Pad(self.image, padding, pad_value)
+            self._image = Padder.Pad(self._image, padding, pad_value)
 
         return self
 
@@ -147,17 +170,32 @@ class ImageProcessor:
             raise ValueError("Padding must be non-negative")
 
         if padding > 0:
-            self.image = Padder.Unpad(self.image, padding)
+            self._image = Padder.Unpad(self._image, padding)
 
         return self
 
-    def Align(self) -> Self:
+    def Align(
+        self, fast: bool = False, lazy: bool = False, **kwargs: Dict[str, Any]
+    ) -> Self:
         """
         Aligns or deskews the image.
+        Args:
+            fast (bool, optional): Use Aligner.DeskewFast, which skips straight pages and warps binary
+                pages with nearest neighbour interpolation. Defaults to False.
+            lazy (bool, optional): Only estimate the skew and keep it in self.transform. AnalyzeLayout
+                then works in deskewed coordinates and warps the regions it extracts on demand, while
+                SegmentIntoLines warps the whole page first. Defaults to False.
+            **kwargs: Additional keyword arguments for Aligner.DeskewFast or Aligner.Transform (epsilon, max_angle, ...).
         Returns:
             self (ImageProcessor): The ImageProcessor object with the aligned image for chaining.
         """
-        self.image = Aligner.DeskewTextHorizontal(self.image)
+        self.transform = None
+        if lazy:
+            self.transform = Aligner.Transform(self._image, **kwargs)
+        elif fast:
+            self._image = Aligner.DeskewFast(self._image, **kwargs)
+        else:
+            self._image = Aligner.DeskewTextHorizontal(self._image)
         return self
 
     def Filter(self, type: FilterType, **kwargs: Dict[str, Any]) -> Self:
@@ -170,8 +208,26 @@ class ImageProcessor:
             self (ImageProcessor): The ImageProcessor object with the filtered image for chaining.
         """
 
-        flt = FilterBuilder.Build(type, **kwargs)
-        self.image = flt.Filter(self.image)
+        flt = KernelCache.Get(
+            KernelCache.MakeKey("filter", type, **kwargs),
+            lambda: FilterBuilder.Build(type, **kwargs),
+        )
+        self._image = flt.Filter(self._image, self._NextPage(), self.pool)
+        return self
+
+    def FilterChain(self, stages: List[Tuple[FilterType, Dict[str, Any]]]) -> Self:
+        """
+        Applies a chain of filters to the image, fusing consecutive linear filters into a single pass.
+        Args:
+            stages (List[Tuple[FilterType, Dict[str, Any]]]): The (type, kwargs) of each filter, in order.
+        Returns:
+            self (ImageProcessor): The ImageProcessor object with the filtered image for chaining.
+        """
+        chain = KernelCache.Get(
+            KernelCache.MakeKey("filter_chain", stages),
+            lambda: FilterBuilder.BuildChain(stages),
+        )
+        self._image = chain.Filter(self._image, self._NextPage(), self.pool)
         return self
 
     def Threshold(
@@ -186,26 +242,94 @@ class ImageProcessor:
         Returns:
             self (ImageProcessor): The ImageProcessor object with the thresholded image for chaining.
         """
-        th = ThresholdingBuilder.Build(type, mode, **kwargs)
-        self.image = th.ApplyThresholding(self.image)
+        th = KernelCache.Get(
+            KernelCache.MakeKey("thresholding", type, mode, **kwargs),
+            lambda: ThresholdingBuilder.Build(type, mode, **kwargs),
+        )
+        self._image = th.ApplyThresholding(self._image, self._NextPage(), self.pool)
         return self
 
     def Morph(
-        self, type: MorphOperationType, kernel: np.ndarray, **kwargs: Dict[str, Any]
+        self,
+        type: MorphOperationType,
+        kernel: np.ndarray,
+        packed: bool = False,
+        **kwargs: Dict[str, Any],
     ) -> Self:
         """
         Applies a morphological operation to the image.
         Args:
             type (MorphOperationType): The type of morphological operation to be applied.
             kernel (np.ndarray, 2D): The kernel to be used for the morphological operation.
+            packed (bool, optional): Whether to run on a bit-packed copy of the image, for binary (thresholded) images only. Defaults to False.
             **kwargs: Additional keyword arguments for specific morphological operations.
         Returns:
             self (ImageProcessor): The ImageProcessor object with the morphologically operated image for chaining.
         """
-        mb = MorphOperationBuilder.Build(type, kernel, **kwargs)
-        self.image = mb.Morph(self.image)
+        mb = KernelCache.Get(
+            KernelCache.MakeKey("morph", type, kernel, **kwargs),
+            lambda: MorphOperationBuilder.Build(type, kernel=kernel, **kwargs),
+        )
+        if packed:
+            max_value = int(self._image.max(initial=0))
+            result = mb.Morph(PackedBinaryImage.FromImage(self._image))
+            self._image = result.ToImage(max_value, self._NextPage())
+        else:
+            self._image = mb.Morph(self._image, self._NextPage(), self.pool)
         return self
 
+    def _NextPage(self) -> Optional[np.ndarray]:
+        """
+        Returns the page buffer the next stage writes into: whichever of the two pooled page
+        buffers does not hold the current image. Stages on non-uint8 images allocate their result.
+        Returns:
+            page (np.ndarray, 2D, uint8 | None): The output buffer, or None to let the stage allocate
+        """
+        if self._image.dtype != np.uint8:
+            return None
+        slot = "page_b" if self.pool.Owner(self._image) == "page_a" else "page_a"
+        return self.pool.Get(self._image.shape, np.uint8, slot)
+
+    def _Detach(self) -> None:
+        """
+        Detaches the page buffer holding the current image from the pool, so later stages
+        write into a new buffer instead of overwriting it
+        """
+        slot = self.pool.Owner(self._image)
+        if slot is not None:
+            self.pool.Detach(slot)
+
+    def _Pin(self) -> None:
+        """
+        Detaches the current page buffer, so segments that are views into it stay valid while
+        later stages keep running, and drops the segmentation masks of the previous page
+        """
+        self._Detach()
+        self.masks.clear()
+
+    def _Mask(self, seg: ISegmenter, region: Region) -> Optional[np.ndarray]:
+        """
+        Returns the page-level mask of a segmenter's morphological operation, computed once
+        per page and operation parameters and then sliced by every region segmented with it
+        Args:
+            seg (ISegmenter): The segmenter
+            region (Region): The region about to be segmented
+        Returns:
+            mask (np.ndarray | None): The morphed page, None if the segmenter has no operation
+        """
+        morphop = getattr(seg, "morphop", None)
+        if morphop is None:
+            return None
+        params = {
+            name: value
+            for name, value in vars(morphop).items()
+            if not isinstance(value, IMorphOperation)
+        }
+        key = KernelCache.MakeKey(type(morphop).__name__, id(region.page), **params)
+        if key not in self.masks:
+            self.masks[key] = morphop.Morph(region.page)
+        return self.masks[key]
+
     def SegmentIntoLines(self, **kwargs: Dict[str, Any]) -> Self:
         """
         Applies a segmentation technique to the image and stores the lines.
@@ -214,9 +338,32 @@ class ImageProcessor:
         Returns:
             self (ImageProcessor): The ImageProcessor object with the segmented image for chaining.
         """
-        self.lines = SegmentationBuilder.Build(SegmentationType.HPP, **kwargs).Segment(
-            self.image
-        )
+        if self.transform is not None:
+            self._image = self.transform.Warp(self._image)
+            self.transform = None
+
+        self._Pin()
+        seg = SegmentationBuilder.Build(SegmentationType.HPP, **kwargs)
+        page = Region.Of(self._image)
+        self.lines = seg.SegmentRegions(page, mask=self._Mask(seg, page))
+        self.layout = None
+        return self
+
+    def AnalyzeLayout(self, **kwargs: Dict[str, Any]) -> Self:
+        """
+        Segments the whole page into lines, words and characters from a single connected
+        component labelling and stores the lines. While the layout is kept, SegmentIntoWords
+        and SegmentIntoChars look the words and characters up in it instead of segmenting.
+        Args:
+            **kwargs: Keyword arguments for LayoutAnalyzer.
+        Returns:
+            self (ImageProcessor): The ImageProcessor object with the segmented image for chaining.
+        """
+        self._Pin()
+        self.layout = LayoutAnalyzer(**kwargs).Analyze(self._image, self.transform)
+        self.lines = self.layout.lines
+        self.words = []
+        self.chars = []
         return self
 
     def SegmentIntoWords(self, line_index: int = 0, **kwargs: Dict[str, Any]) -> Self:
@@ -224,7 +371,7 @@ class ImageProcessor:
         Applies a segmentation technique to the image and stores the words.
         Args:
             line_index (int, optional): The index of the line to be segmented. Defaults to 0 (first line).
-            **kwargs: Additional keyword arguments for specific segmentation types.
+            **kwargs: Additional keyword arguments for specific segmentation types, ignored when a layout is kept.
         Returns:
             self (ImageProcessor): The ImageProcessor object with the segmented image for chaining.
         """
@@ -237,8 +384,13 @@ class ImageProcessor:
         if line_index >= len(self.lines):
             raise IndexError("Index out of range")
 
+        if self.layout is not None:
+            self.words = self.layout.WordsOf(line_index)
+            return self
+
         seg = SegmentationBuilder.Build(SegmentationType.VPP, **kwargs)
-        self.words = seg.Segment(self.lines[line_index])
+        line = self.lines[line_index]
+        self.words = seg.SegmentRegions(line, line_index, self._Mask(seg, line))
         return self
 
     def SegmentIntoChars(self, word_index: int = 0, **kwargs: Dict[str, Any]) -> Self:
@@ -246,7 +398,7 @@ class ImageProcessor:
         Applies a segmentation technique to the image and stores the characters.
         Args:
             word_index (int, optional): The index of the word to be segmented. Defaults to 0 (first word).
-            **kwargs: Additional keyword arguments for specific segmentation types.
+            **kwargs: Additional keyword arguments for specific segmentation types, ignored when a layout is kept.
         Returns:
             self (ImageProcessor): The ImageProcessor object with the segmented image for chaining.
         """
@@ -259,8 +411,14 @@ class ImageProcessor:
         if word_index >= len(self.words):
             raise IndexError("Index out of range")
 
+        if self.layout is not None:
+            word = self.words[word_index]
+            self.chars = self.layout.CharsOf(self.layout.words.index(word))
+            return self
+
         seg = SegmentationBuilder.Build(SegmentationType.CCA, **kwargs)
-        self.chars = seg.Segment(self.words[word_index])
+        word = self.words[word_index]
+        self.chars = seg.SegmentRegions(word, word_index, self._Mask(seg, word))
         return self
     
     
@@ -288,7 +446,7 @@ class OCRPipeline(ImageProcessor):
         if len(self.chars) == 0:
             raise ValueError("Character or CCA segmentation must be performed first")
         
-        result = self.ocr_model.recognize_word(self.chars)
+        result = self.ocr_model.recognize_word([char.view for char in self.chars])
 
         if isinstance(result, str):
             self.predicted = list(result)
@@ -1,20 +1,29 @@
-from .alignment import AlignmentUtil as Aligner
+from .alignment import AlignmentUtil as Aligner, SkewTransform
+from .buffers import BufferPoolUtil as BufferPool
+from .cache import KernelCacheUtil as KernelCache
 from .calc import CalcUtil as CVMath
 from .converter import ConverterUtil as ColorConverter
 from .kernel import (
     KernelUtil as KernelGenerator,
     MorphKernelUtil as MorphKernelGenerator,
 )
+from .median import MedianUtil as MedianEngine
 from .pad import PadUtil as Padder
 from .plot import PlotUtil as Plotter
+from .tiling import TilingUtil as Tiler
 
 
 __all__ = [
     "Aligner",
+    "SkewTransform",
+    "BufferPool",
     "CVMath",
+    "KernelCache",
     "ColorConverter",
     "KernelGenerator",
     "MorphKernelGenerator",
+    "MedianEngine",
     "Padder",
     "Plotter",
+    "Tiler",
 ]
@@ -1,5 +1,6 @@
 import cv2
 import numpy as np
+from typing import Any, Dict, Optional, Tuple
 
 
 class AlignmentUtil:
@@ -38,3 +39,247 @@ class AlignmentUtil:
         )
 
         return rotated
+
+    @staticmethod
+    def EstimateSkew(
+        image: np.ndarray,
+        max_angle: float = 15.0,
+        coarse_step: float = 1.0,
+        fine_step: float = 0.1,
+        scale: float = 0.25,
+        max_points: int = 200000,
+    ) -> float:
+        """
+        Estimates the angle that makes the text lines of a binarized image horizontal. A coarse
+        search runs on the ink of a downsampled copy, then a fine search within one coarse step
+        of its result runs on (sampled) full resolution ink. Every candidate angle is scored by
+        the sharpness (sum of squares) of the horizontal projection profile of the rotated ink
+        coordinates, so no image is ever rotated.
+        Args:
+            image (np.ndarray, 2D): The binarized input image, ink > 0.
+            max_angle (float, optional): The largest skew searched for, in degrees. Defaults to 15.
+            coarse_step (float, optional): The coarse search step, in degrees. Defaults to 1.
+            fine_step (float, optional): The fine search step, in degrees. Defaults to 0.1.
+            scale (float, optional): The downsampling factor of the coarse search. Defaults to 0.25.
+            max_points (int, optional): The most ink pixels used by the fine search. Defaults to 200000.
+        Returns:
+            angle (float): The rotation angle in degrees, as taken by cv2.getRotationMatrix2D.
+        """
+        h, w = image.shape[:2]
+        small = cv2.resize(
+            (image > 0).astype(np.uint8),
+            (max(1, round(w * scale)), max(1, round(h * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+        ys, xs = np.nonzero(small)
+        if ys.size == 0:
+            return 0.0
+
+        coarse = np.arange(-max_angle, max_angle + coarse_step / 2, coarse_step)
+        angle = AlignmentUtil._BestAngle(xs, ys, coarse)
+
+        ys, xs = np.nonzero(image > 0)
+        stride = -(-ys.size // max_points)
+        fine = np.arange(angle - coarse_step, angle + coarse_step + fine_step / 2, fine_step)
+        return AlignmentUtil._BestAngle(xs[::stride], ys[::stride], fine)
+
+    @staticmethod
+    def _BestAngle(xs: np.ndarray, ys: np.ndarray, angles: np.ndarray) -> float:
+        """
+        Returns the candidate angle whose rotation gives the sharpest horizontal projection
+        profile of the points. Rows follow cv2.getRotationMatrix2D: y' = -sin(a) x + cos(a) y.
+        """
+        xs = xs.astype(np.float64) - xs.mean()
+        ys = ys.astype(np.float64) - ys.mean()
+        radians = np.deg2rad(angles)
+        scores = np.empty(angles.size)
+        for i, a in enumerate(radians):
+            rows = np.rint(ys * np.cos(a) - xs * np.sin(a)).astype(np.int64)
+            profile = np.bincount(rows - rows.min())
+            scores[i] = np.dot(profile, profile)
+        # Ties (e.g. a single dot) favor the smallest rotation
+        best = np.flatnonzero(scores == scores.max())
+        return round(float(angles[best[np.argmin(np.abs(angles[best]))]]), 6) + 0.0
+
+    @staticmethod
+    def IsBinary(image: np.ndarray) -> bool:
+        """
+        Checks whether an image only holds 0 and one other value, e.g. a thresholded page.
+        Args:
+            image (np.ndarray): The input image.
+        Returns:
+            binary (bool): True if the image is binary.
+        """
+        peak = image.max() if image.size else 0
+        return not np.any((image != 0) & (image != peak))
+
+    @staticmethod
+    def Rotate(
+        image: np.ndarray,
+        angle: float,
+        epsilon: float = 0.05,
+        interpolation: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Rotates an image about its center, keeping its size and replicating the border.
+        Args:
+            image (np.ndarray, 2D): The input image.
+            angle (float): The rotation angle in degrees, as taken by cv2.getRotationMatrix2D.
+            epsilon (float, optional): Angles smaller than it in magnitude are not applied and the
+                image is returned as is. Defaults to 0.05.
+            interpolation (int, optional): The cv2 interpolation flag. Defaults to None, nearest
+                neighbour for binary images (which keeps them binary) and cubic otherwise.
+        Returns:
+            rotated (np.ndarray, 2D): The rotated image.
+        """
+        if abs(angle) < epsilon:
+            return image
+        if interpolation is None:
+            binary = AlignmentUtil.IsBinary(image)
+            interpolation = cv2.INTER_NEAREST if binary else cv2.INTER_CUBIC
+
+        (h, w) = image.shape[:2]
+        M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+        return cv2.warpAffine(
+            image, M, (w, h), flags=interpolation, borderMode=cv2.BORDER_REPLICATE
+        )
+
+    @staticmethod
+    def DeskewFast(
+        image: np.ndarray, epsilon: float = 0.05, **kwargs: Dict[str, Any]
+    ) -> np.ndarray:
+        """
+        Deskews a binarized image with EstimateSkew and Rotate: straight pages are returned
+        untouched and binary pages are warped with nearest neighbour interpolation.
+        Args:
+            image (np.ndarray, 2D): The input image to be deskewed.
+            epsilon (float, optional): Skews smaller than it in magnitude are ignored. Defaults to 0.05.
+            **kwargs: Additional keyword arguments for EstimateSkew.
+        Returns:
+            deskewed (np.ndarray, 2D): The deskewed image.
+        """
+        angle = AlignmentUtil.EstimateSkew(image, **kwargs)
+        return AlignmentUtil.Rotate(image, angle, epsilon)
+
+    @staticmethod
+    def Transform(
+        image: np.ndarray, epsilon: float = 0.05, **kwargs: Dict[str, Any]
+    ) -> "SkewTransform":
+        """
+        Estimates the skew of a binarized image without warping it.
+        Args:
+            image (np.ndarray, 2D): The input image.
+            epsilon (float, optional): Skews smaller than it in magnitude give the identity. Defaults to 0.05.
+            **kwargs: Additional keyword arguments for EstimateSkew.
+        Returns:
+            transform (SkewTransform): The deskewing transform of the image.
+        """
+        angle = AlignmentUtil.EstimateSkew(image, **kwargs)
+        binary = AlignmentUtil.IsBinary(image)
+        return SkewTransform(
+            angle if abs(angle) >= epsilon else 0.0,
+            image.shape,
+            cv2.INTER_NEAREST if binary else cv2.INTER_CUBIC,
+        )
+
+
+class SkewTransform:
+    """
+    The rotation that deskews a page, kept as a pair of affine matrices instead of a warped
+    copy of the page. Points and boxes map both ways, and Warp resamples only the requested
+    box of the deskewed page. The crop matches the same box of the fully warped page up to
+    OpenCV's fixed-point coordinate rounding, which shifts with the box offset: about one pixel
+    in 10^4 differs, by picking the neighbouring source pixel with nearest neighbour
+    interpolation and by one gray level with linear or cubic interpolation.
+    """
+
+    __slots__ = ("angle", "matrix", "inverse", "shape", "interpolation")
+
+    def __init__(
+        self, angle: float, shape: Tuple[int, ...], interpolation: int = cv2.INTER_CUBIC
+    ):
+        """
+        Constructor for SkewTransform class
+        Args:
+            angle (float): The rotation angle in degrees, as taken by cv2.getRotationMatrix2D
+            shape (Tuple[int, ...]): The page shape, the deskewed page has the same size
+            interpolation (int, optional): The cv2 interpolation flag of Warp. Defaults to cubic.
+        """
+        h, w = shape[:2]
+        self.angle = angle
+        self.shape = (h, w)
+        self.interpolation = interpolation
+        self.matrix = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+        self.inverse = cv2.invertAffineTransform(self.matrix)
+
+    @property
+    def identity(self) -> bool:
+        """
+        True if the transform does not move the page
+        """
+        return self.angle == 0
+
+    def Map(self, points: np.ndarray, inverse: bool = False) -> np.ndarray:
+        """
+        Maps points from the original to the deskewed page, or back
+        Args:
+            points (np.ndarray, 2D): One (x, y) row per point
+            inverse (bool, optional): Map from the deskewed to the original page. Defaults to False.
+        Returns:
+            mapped (np.ndarray, 2D, float64): The mapped points
+        """
+        M = self.inverse if inverse else self.matrix
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return points @ M[:, :2].T + M[:, 2]
+
+    def MapBoxes(self, boxes: np.ndarray, inverse: bool = False) -> np.ndarray:
+        """
+        Maps boxes from the original to the deskewed page, or back, as the bounding boxes of
+        their mapped corners clipped to the page
+        Args:
+            boxes (np.ndarray, 2D): One (x, y, w, h) row per box
+            inverse (bool, optional): Map from the deskewed to the original page. Defaults to False.
+        Returns:
+            mapped (np.ndarray, 2D, int64): The mapped (x, y, w, h) boxes
+        """
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        if self.identity:
+            return boxes.copy()
+        x, y, w, h = boxes.T
+        corners = np.stack(
+            [np.stack([x, y], 1), np.stack([x + w, y], 1),
+             np.stack([x, y + h], 1), np.stack([x + w, y + h], 1)], axis=1
+        )
+        mapped = self.Map(corners.reshape(-1, 2), inverse).reshape(-1, 4, 2)
+        H, W = self.shape
+        left = np.clip(np.floor(mapped[..., 0].min(axis=1)), 0, W).astype(np.int64)
+        top = np.clip(np.floor(mapped[..., 1].min(axis=1)), 0, H).astype(np.int64)
+        right = np.clip(np.ceil(mapped[..., 0].max(axis=1)), 0, W).astype(np.int64)
+        bottom = np.clip(np.ceil(mapped[..., 1].max(axis=1)), 0, H).astype(np.int64)
+        return np.stack([left, top, right - left, bottom - top], axis=1)
+
+    def Warp(
+        self, image: np.ndarray, box: Optional[Tuple[int, int, int, int]] = None
+    ) -> np.ndarray:
+        """
+        Resamples a box of the deskewed page from the original page
+        Args:
+            image (np.ndarray, 2D): The original page
+            box (Tuple[int, int, int, int], optional): The (x, y, w, h) box in deskewed coordinates.
+                Defaults to None, the whole page.
+        Returns:
+            crop (np.ndarray, 2D): The deskewed pixels of the box
+        """
+        if box is None:
+            box = (0, 0, self.shape[1], self.shape[0])
+        x, y, w, h = box
+        if self.identity:
+            return image[y : y + h, x : x + w]
+        if w <= 0 or h <= 0:
+            return np.empty((max(h, 0), max(w, 0)), dtype=image.dtype)
+
+        M = self.matrix.copy()
+        M[:, 2] -= (x, y)
+        return cv2.warpAffine(
+            image, M, (w, h), flags=self.interpolation, borderMode=cv2.BORDER_REPLICATE
+        )
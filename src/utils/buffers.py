@@ -0,0 +1,119 @@
+import threading
+import numpy as np
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class BufferPoolUtil:
+    """
+    Pool of reusable scratch buffers, one per named slot. Every slot keeps a flat backing
+    array that only grows, so requests for pages of varying sizes are served from the
+    same memory. A buffer stays valid until the next Get on the same slot, callers that
+    need to keep a result longer must copy it or Detach the slot.
+    """
+
+    def __init__(self):
+        """
+        Constructor for BufferPoolUtil class
+        """
+        self._slots: Dict[Hashable, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def Get(
+        self, shape: Tuple[int, ...], dtype: np.dtype, slot: Hashable = "scratch"
+    ) -> np.ndarray:
+        """
+        Returns an uninitialized buffer of the given shape and dtype, backed by the slot's memory
+        Args:
+            shape (Tuple[int, ...]): The buffer shape
+            dtype (np.dtype): The buffer data type
+            slot (Hashable): The slot name, buffers of different slots never overlap
+        Returns:
+            buffer (np.ndarray): The buffer, C-contiguous
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        with self._lock:
+            backing = self._slots.get(slot)
+            if backing is None or backing.size < nbytes:
+                backing = np.empty(nbytes, dtype=np.uint8)
+                self._slots[slot] = backing
+        return backing[:nbytes].view(dtype).reshape(shape)
+
+    def Detach(self, slot: Hashable) -> None:
+        """
+        Hands the slot's memory over to the buffers already returned for it: the pool forgets
+        it and the next Get on the slot allocates new memory
+        Args:
+            slot (Hashable): The slot name
+        """
+        with self._lock:
+            self._slots.pop(slot, None)
+
+    def Owner(self, array: np.ndarray) -> Optional[Hashable]:
+        """
+        Finds the slot whose memory an array lives in
+        Args:
+            array (np.ndarray): The array to look up
+        Returns:
+            slot (Hashable | None): The slot name, or None if the array is not backed by the pool
+        """
+        with self._lock:
+            for slot, backing in self._slots.items():
+                if np.may_share_memory(array, backing):
+                    return slot
+        return None
+
+    def Clear(self) -> None:
+        """
+        Releases the memory of every slot
+        """
+        with self._lock:
+            self._slots.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The total memory held by the pool, in bytes
+        """
+        with self._lock:
+            return sum(backing.size for backing in self._slots.values())
+
+    @staticmethod
+    def Scratch(
+        pool: Optional["BufferPoolUtil"],
+        shape: Tuple[int, ...],
+        dtype: np.dtype,
+        slot: Hashable = "scratch",
+    ) -> np.ndarray:
+        """
+        Returns a scratch buffer from a pool, or a freshly allocated one when there is no pool
+        Args:
+            pool (BufferPoolUtil | None): The pool to draw from
+            shape (Tuple[int, ...]): The buffer shape
+            dtype (np.dtype): The buffer data type
+            slot (Hashable): The slot name
+        Returns:
+            buffer (np.ndarray): The uninitialized buffer
+        """
+        if pool is None:
+            return np.empty(shape, dtype=dtype)
+        return pool.Get(shape, dtype, slot)
+
+    @staticmethod
+    def Write(result: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Stores a result into a caller-supplied buffer
+        Args:
+            result (np.ndarray): The computed result
+            out (np.ndarray | None): The buffer to write into, None to return the result as is
+        Returns:
+            image (np.ndarray): out holding the result, or the result itself
+        """
+        if out is None or result is out:
+            return result
+        if out.shape != result.shape:
+            raise ValueError(
+                f"Output buffer shape {out.shape} does not match the result shape {result.shape}"
+            )
+        np.copyto(out, result, casting="same_kind")
+        return out
@@ -0,0 +1,152 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class KernelCacheUtil:
+    """
+    Process-wide LRU cache for kernels, the data operators derive from them
+    (flipped kernels, separable factors, boolean masks) and built operators.
+    Cached arrays are made read-only since they are shared between callers. Keys holding
+    arrays larger than max_key_bytes (e.g. a page-sized marker image) are not cached, their
+    values are built on every call.
+    """
+
+    max_size = 256
+    max_key_bytes = 1 << 16
+    hits = 0
+    misses = 0
+    _entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def Get(key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value for a key, building it with the factory on a miss
+        Args:
+            key (Hashable): The cache key, e.g. (kind, size, sigma, dtype)
+            factory (Callable[[], Any]): Builds the value when it is not cached
+        Returns:
+            value (Any): The cached value, arrays are read-only
+        """
+        if not KernelCacheUtil._Cacheable(key):
+            return factory()
+
+        cls = KernelCacheUtil
+        with cls._lock:
+            if key in cls._entries:
+                cls._entries.move_to_end(key)
+                cls.hits += 1
+                return cls._entries[key]
+            cls.misses += 1
+
+        # Built outside the lock, factories may themselves use the cache
+        value = KernelCacheUtil._Freeze(factory())
+
+        with cls._lock:
+            cls._entries[key] = value
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > cls.max_size:
+                cls._entries.popitem(last=False)
+        return value
+
+    @staticmethod
+    def Derive(kind: str, kernel: np.ndarray, factory: Callable[[np.ndarray], Any]) -> Any:
+        """
+        Returns data derived from a kernel (e.g. its flipped copy), computed once per kernel content
+        Args:
+            kind (str): The kind of derived data
+            kernel (np.ndarray): The source kernel
+            factory (Callable[[np.ndarray], Any]): Derives the data from the kernel
+        Returns:
+            value (Any): The cached derived data, arrays are read-only
+        """
+        return KernelCacheUtil.Get(
+            (kind, KernelCacheUtil.MakeKey(kernel)), lambda: factory(kernel)
+        )
+
+    @staticmethod
+    def MakeKey(*parts: Any, **kwargs: Any) -> Hashable:
+        """
+        Builds a hashable cache key from arbitrary arguments. Arrays are keyed on their content,
+        those larger than max_key_bytes on their identity, which keeps the key small and Get
+        from caching it
+        Args:
+            *parts (Any): Positional key parts
+            **kwargs (Any): Keyword key parts
+        Returns:
+            key (Hashable): The cache key
+        """
+        def freeze(value: Any) -> Hashable:
+            if isinstance(value, np.ndarray):
+                if value.nbytes > KernelCacheUtil.max_key_bytes:
+                    return ("ndarray_ref", value.shape, value.dtype.str, id(value))
+                return ("ndarray", value.shape, value.dtype.str, value.tobytes())
+            if isinstance(value, dict):
+                return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+            if isinstance(value, (list, tuple)):
+                return tuple(freeze(v) for v in value)
+            return value
+
+        return freeze(parts) + freeze(kwargs)
+
+    @staticmethod
+    def Stats() -> Dict[str, int]:
+        """
+        Returns the cache counters
+        Returns:
+            stats (Dict[str, int]): The hits, misses, current size and maximum size of the cache
+        """
+        cls = KernelCacheUtil
+        with cls._lock:
+            return {
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "size": len(cls._entries),
+                "max_size": cls.max_size,
+            }
+
+    @staticmethod
+    def Resize(max_size: int) -> None:
+        """
+        Sets the maximum number of cached entries, evicting the least recently used ones
+        Args:
+            max_size (int): The maximum number of entries
+        """
+        if max_size < 1:
+            raise ValueError("Cache size must be positive")
+
+        cls = KernelCacheUtil
+        with cls._lock:
+            cls.max_size = max_size
+            while len(cls._entries) > cls.max_size:
+                cls._entries.popitem(last=False)
+
+    @staticmethod
+    def Clear() -> None:
+        """
+        Empties the cache and resets its counters
+        """
+        cls = KernelCacheUtil
+        with cls._lock:
+            cls._entries.clear()
+            cls.hits = 0
+            cls.misses = 0
+
+    @staticmethod
+    def _Cacheable(key: Hashable) -> bool:
+        if isinstance(key, tuple):
+            if key[:1] == ("ndarray_ref",):
+                return False
+            return all(KernelCacheUtil._Cacheable(part) for part in key)
+        return True
+
+    @staticmethod
+    def _Freeze(value: Any) -> Any:
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+        elif isinstance(value, tuple):
+            for item in value:
+                KernelCacheUtil._Freeze(item)
+        return value
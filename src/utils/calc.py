@@ -4,10 +4,25 @@ import numpy as np
 
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+from typing import Optional, Tuple
+
+from .buffers import BufferPoolUtil
+from .cache import KernelCacheUtil
+from .tiling import TilingUtil
 
 
 class CalcUtil:
+    # Above this kernel area cv2.filter2D switches to a DFT-based path whose rounding
+    # depends on the input size, so tiles would no longer match the untiled result.
+    # For float64 images the switch already happens above 7x7.
+    TILE_MAX_KERNEL_AREA = 121
+    TILE_MAX_KERNEL_AREA_FLOAT64 = 49
+    # Kernels from 15x15 up on images from 512x512 up are convolved in the frequency domain
+    FFT_MIN_KERNEL_AREA = 15 * 15
+    FFT_MIN_PIXELS = 512 * 512
+    # Separable kernels stay on two 1D passes until they are this long in total
+    FFT_MIN_SEPARABLE_LENGTH = 96
+
     @staticmethod
     def Normalize(image: np.ndarray) -> np.ndarray:
         """
@@ -20,29 +35,354 @@ class CalcUtil:
         return image / 255.0
 
     @staticmethod
-    def Convolve(image: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    def Convolve(
+        image: np.ndarray,
+        kernel: np.ndarray,
+        tiled: Optional[bool] = None,
+        workers: Optional[int] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
         """
         Applies a convolution to an image using a given kernel
         Args:
             image (np.ndarray, 2D): The input image
             kernel (np.ndarray, 2D): The convolution kernel
+            tiled (bool | None): Whether to filter in multi-threaded strips, None to decide from the image size
+            workers (int | None): Number of threads for the tiled mode. Defaults to the shared pool.
+            out (np.ndarray | None): Buffer to write the result into, must not overlap the image
         Returns:
             image (np.ndarray, 2D): The convolved image
         """
-        flipped_kernel = cv2.flip(kernel, -1)
-        return cv2.filter2D(image, -1, flipped_kernel)
+        if CalcUtil.UseFFT(image, kernel):
+            return CalcUtil.FFTConvolve(image, kernel, tiled, workers, out)
+
+        flipped_kernel = KernelCacheUtil.Derive(
+            "flipped", kernel, lambda k: cv2.flip(k, -1)
+        )
+        return CalcUtil.Correlate(image, flipped_kernel, tiled, workers, out)
 
     @staticmethod
-    def Correlate(image: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    def Correlate(
+        image: np.ndarray,
+        kernel: np.ndarray,
+        tiled: Optional[bool] = None,
+        workers: Optional[int] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
         """
-        Applies a correlation to an image using a given kernel
+        Applies a correlation to an image using a given kernel. In tiled mode the image is split
+        into horizontal strips with halo rows, filtered on a thread pool (OpenCV releases the GIL)
+        and written into one preallocated output, bit-identical to the untiled result. Kernels
+        large enough for OpenCV's DFT path (see TILE_MAX_KERNEL_AREA) are never tiled.
         Args:
             image (np.ndarray, 2D): The input image
             kernel (np.ndarray, 2D): The correlation kernel
+            tiled (bool | None): Whether to filter in multi-threaded strips, None to decide from the image size
+            workers (int | None): Number of threads for the tiled mode. Defaults to the shared pool.
+            out (np.ndarray | None): Buffer to write the result into, must not overlap the image
         Returns:
             image (np.ndarray, 2D): The correlated image
         """
-        return cv2.filter2D(image, -1, kernel)
+        if CalcUtil.UseFFT(image, kernel):
+            flipped_kernel = KernelCacheUtil.Derive(
+                "flipped", kernel, lambda k: cv2.flip(k, -1)
+            )
+            return CalcUtil.FFTConvolve(image, flipped_kernel, tiled, workers, out)
+
+        max_area = (
+            CalcUtil.TILE_MAX_KERNEL_AREA_FLOAT64
+            if image.dtype == np.float64
+            else CalcUtil.TILE_MAX_KERNEL_AREA
+        )
+        if TilingUtil.ShouldTile(image, tiled) and kernel.size <= max_area:
+            kh = kernel.shape[0]
+            return TilingUtil.Apply(
+                image,
+                lambda strip: cv2.filter2D(strip, -1, kernel),
+                kh // 2,
+                kh - 1 - kh // 2,
+                workers=workers,
+                out=out,
+            )
+        dst = CalcUtil._Destination(out, image.shape, image.dtype)
+        return BufferPoolUtil.Write(cv2.filter2D(image, -1, kernel, dst=dst), out)
+
+    @staticmethod
+    def UseFFT(image: np.ndarray, kernel: np.ndarray, separable: bool = False) -> bool:
+        """
+        Decides whether a convolution is cheaper in the frequency domain, based on the kernel
+        and image sizes
+        Args:
+            image (np.ndarray, 2D): The input image
+            kernel (np.ndarray, 2D): The convolution kernel
+            separable (bool): Whether the kernel would otherwise be applied as two 1D passes
+        Returns:
+            use_fft (bool): Whether to use FFTConvolve
+        """
+        if image.ndim != 2 or image.size < CalcUtil.FFT_MIN_PIXELS:
+            return False
+        if separable:
+            return sum(kernel.shape) >= CalcUtil.FFT_MIN_SEPARABLE_LENGTH
+        return kernel.size >= CalcUtil.FFT_MIN_KERNEL_AREA
+
+    @staticmethod
+    def FFTConvolve(
+        image: np.ndarray,
+        kernel: np.ndarray,
+        tiled: Optional[bool] = None,
+        workers: Optional[int] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Applies a convolution to an image in the frequency domain (numpy.fft.rfft2), equivalent
+        to Convolve with the same reflected borders and output data type. The image is processed
+        in blocks sized to a few kernel widths (overlap-save: every block reads its halo and
+        keeps only its valid part), so the FFT size, and with it the memory, stays bounded.
+        Unlike the direct path, tiled results may differ from untiled ones by rounding.
+        Args:
+            image (np.ndarray, 2D): The input image
+            kernel (np.ndarray, 2D): The convolution kernel
+            tiled (bool | None): Whether to convolve in multi-threaded strips, None to decide from the image size
+            workers (int | None): Number of threads for the tiled mode. Defaults to the shared pool.
+            out (np.ndarray | None): Buffer to write the result into, must not overlap the image
+        Returns:
+            image (np.ndarray, 2D): The convolved image
+        """
+        kh = kernel.shape[0]
+        if TilingUtil.ShouldTile(image, tiled):
+            return TilingUtil.Apply(
+                image,
+                lambda strip: CalcUtil._FFTConvolveBlocks(strip, kernel),
+                kh // 2,
+                kh - 1 - kh // 2,
+                tile_rows=max(TilingUtil.TILE_ROWS, 4 * kh),
+                workers=workers,
+                out=out,
+            )
+        return BufferPoolUtil.Write(CalcUtil._FFTConvolveBlocks(image, kernel), out)
+
+    @staticmethod
+    def _FFTConvolveBlocks(image: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+        h, w = image.shape
+        kh, kw = kernel.shape
+        cy, cx = kh // 2, kw // 2
+        dtype = np.float64 if image.dtype == np.float64 else np.float32
+
+        padded = cv2.copyMakeBorder(
+            image, cy, kh - 1 - cy, cx, kw - 1 - cx, cv2.BORDER_REFLECT_101
+        ).astype(dtype, copy=False)
+
+        block = max(4 * max(kh, kw), 128)
+        fh = CalcUtil._FastLength(min(block, h) + kh - 1)
+        fw = CalcUtil._FastLength(min(block, w) + kw - 1)
+        th, tw = fh - kh + 1, fw - kw + 1
+        spectrum = KernelCacheUtil.Derive(
+            f"rfft2_{fh}x{fw}",
+            kernel.astype(dtype, copy=False),
+            lambda k: np.fft.rfft2(k, (fh, fw)),
+        )
+
+        output = np.empty((h, w), dtype=dtype)
+        for y in range(0, h, th):
+            for x in range(0, w, tw):
+                tile = np.fft.rfft2(padded[y : y + fh, x : x + fw], (fh, fw))
+                tile = np.fft.irfft2(tile * spectrum, (fh, fw))
+                bh, bw = min(th, h - y), min(tw, w - x)
+                output[y : y + bh, x : x + bw] = tile[kh - 1 : kh - 1 + bh, kw - 1 : kw - 1 + bw]
+
+        if np.issubdtype(image.dtype, np.integer):
+            info = np.iinfo(image.dtype)
+            np.rint(output, out=output)
+            np.clip(output, info.min, info.max, out=output)
+        return output.astype(image.dtype, copy=False)
+
+    @staticmethod
+    def _FastLength(n: int) -> int:
+        """
+        Returns the smallest 5-smooth number (2^a 3^b 5^c) not below n, a fast FFT length
+        """
+        while True:
+            m = n
+            for p in (2, 3, 5):
+                while m % p == 0:
+                    m //= p
+            if m == 1:
+                return n
+            n += 1
+
+    @staticmethod
+    def _Destination(
+        out: Optional[np.ndarray], shape: Tuple[int, ...], dtype: np.dtype
+    ) -> Optional[np.ndarray]:
+        """
+        Returns out if OpenCV can write into it directly, None if the result must be copied
+        """
+        if (
+            out is not None
+            and out.shape == shape
+            and out.dtype == dtype
+            and out.flags.c_contiguous
+        ):
+            return out
+        return None
+
+    @staticmethod
+    def SeparateKernel(
+        kernel: np.ndarray, tol: float = 1e-6
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Factors a rank-1 kernel into a column and a row kernel such that
+        np.outer(column, row) == kernel
+        Args:
+            kernel (np.ndarray, 2D): The kernel to be factored
+            tol (float): Relative tolerance on the second singular value
+        Returns:
+            factors (Tuple[np.ndarray, np.ndarray] | None): The (column, row) kernels, or None if the kernel is not separable
+        """
+        if kernel.ndim != 2 or min(kernel.shape) == 1:
+            return None
+
+        u, s, vt = np.linalg.svd(kernel.astype(np.float64))
+        if s[0] == 0 or s[1] > tol * s[0]:
+            return None
+
+        scale = np.sqrt(s[0])
+        column, row = u[:, 0] * scale, vt[0] * scale
+        # Keep the factors sign-consistent with the dominant kernel entry
+        if column[np.argmax(np.abs(column))] < 0:
+            column, row = -column, -row
+        return column.astype(kernel.dtype), row.astype(kernel.dtype)
+
+    @staticmethod
+    def SeparableConvolve(
+        image: np.ndarray,
+        column_kernel: np.ndarray,
+        row_kernel: np.ndarray,
+        tiled: Optional[bool] = None,
+        workers: Optional[int] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Applies a separable convolution to an image as two 1D passes, equivalent to
+        Convolve(image, np.outer(column_kernel, row_kernel)) at O(kh + kw) per pixel
+        Args:
+            image (np.ndarray, 2D): The input image
+            column_kernel (np.ndarray, 1D): The vertical convolution kernel
+            row_kernel (np.ndarray, 1D): The horizontal convolution kernel
+            tiled (bool | None): Whether to filter in multi-threaded strips, None to decide from the image size
+            workers (int | None): Number of threads for the tiled mode. Defaults to the shared pool.
+            out (np.ndarray | None): Buffer to write the result into, must not overlap the image
+        Returns:
+            image (np.ndarray, 2D): The convolved image
+        """
+        kx = np.ascontiguousarray(row_kernel[::-1])
+        ky = np.ascontiguousarray(column_kernel[::-1])
+        if TilingUtil.ShouldTile(image, tiled):
+            kh = ky.size
+            return TilingUtil.Apply(
+                image,
+                lambda strip: cv2.sepFilter2D(strip, -1, kx, ky),
+                kh // 2,
+                kh - 1 - kh // 2,
+                workers=workers,
+                out=out,
+            )
+        dst = CalcUtil._Destination(out, image.shape, image.dtype)
+        return BufferPoolUtil.Write(cv2.sepFilter2D(image, -1, kx, ky, dst=dst), out)
+
+    @staticmethod
+    def ComposeKernels(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """
+        Composes two convolution kernels into one, such that convolving with the result
+        equals convolving with first and then with second (away from the borders)
+        Args:
+            first (np.ndarray, 2D): The kernel applied first
+            second (np.ndarray, 2D): The kernel applied second
+        Returns:
+            kernel (np.ndarray, 2D, float64): The full 2D convolution of both kernels
+        """
+        if first.size < second.size:
+            first, second = second, first
+
+        (h1, w1), (h2, w2) = first.shape, second.shape
+        kernel = np.zeros((h1 + h2 - 1, w1 + w2 - 1), dtype=np.float64)
+        for (i, j), value in np.ndenumerate(second):
+            if value != 0:
+                kernel[i : i + h1, j : j + w1] += value * first
+        return kernel
+
+    @staticmethod
+    def IntegralImage(image: np.ndarray, squared: bool = False) -> np.ndarray:
+        """
+        Computes the summed-area table of an image, with a leading row and column of zeros
+        Args:
+            image (np.ndarray, 2D): The input image
+            squared (bool): Whether to sum the squared pixel values instead
+        Returns:
+            table (np.ndarray, 2D, float64): The (h + 1, w + 1) summed-area table
+        """
+        if squared:
+            return cv2.integral2(image, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)[1]
+        return cv2.integral(image, sdepth=cv2.CV_64F)
+
+    @staticmethod
+    def BoxSum(
+        image: np.ndarray,
+        kernel_size: int,
+        squared: bool = False,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Sums every kernel_size x kernel_size window of an image using a summed-area table,
+        at a cost independent of the window size. Borders are reflected like cv2.filter2D
+        (BORDER_REFLECT_101).
+        Args:
+            image (np.ndarray, 2D): The input image
+            kernel_size (int): The size of the square window
+            squared (bool): Whether to sum the squared pixel values instead
+            out (np.ndarray, float64, optional): Buffer to write the sums into
+        Returns:
+            sums (np.ndarray, 2D, float64): The window sums, same shape as the input
+        """
+        before = kernel_size // 2
+        after = kernel_size - 1 - before
+        padded = cv2.copyMakeBorder(
+            image, before, after, before, after, cv2.BORDER_REFLECT_101
+        )
+        table = CalcUtil.IntegralImage(padded, squared)
+        k = kernel_size
+        sums = np.subtract(table[k:, k:], table[:-k, k:], out=out)
+        sums -= table[k:, :-k]
+        sums += table[:-k, :-k]
+        return sums
+
+    @staticmethod
+    def BoxMean(
+        image: np.ndarray,
+        kernel_size: int,
+        out: Optional[np.ndarray] = None,
+        scratch: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Applies a normalized box (average) filter using a summed-area table
+        Args:
+            image (np.ndarray, 2D): The input image
+            kernel_size (int): The size of the square window
+            out (np.ndarray | None): Buffer to write the result into
+            scratch (np.ndarray, float64, optional): Buffer for the intermediate window sums
+        Returns:
+            image (np.ndarray, 2D): The filtered image, same dtype as the input
+        """
+        mean = CalcUtil.BoxSum(image, kernel_size, out=scratch)
+        mean /= kernel_size * kernel_size
+        if np.issubdtype(image.dtype, np.integer):
+            info = np.iinfo(image.dtype)
+            np.rint(mean, out=mean)
+            np.clip(mean, info.min, info.max, out=mean)
+        if out is None:
+            return mean.astype(image.dtype)
+        np.copyto(out, mean, casting="unsafe")
+        return out
 
     @staticmethod
     def CosineSimilarity(first_string: str, second_string: str) -> float:
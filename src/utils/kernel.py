@@ -1,47 +1,124 @@
 import numpy as np
+from typing import Tuple
+
+from .cache import KernelCacheUtil
 
 
 class KernelUtil:
     @staticmethod
-    def GetGaussianKernel(sigma: float = 1.0, kernel_size: int = 5) -> np.ndarray:
+    def GetGaussianKernel(
+        sigma: float = 1.0, kernel_size: int = 5, dtype: type = np.float64
+    ) -> np.ndarray:
         """
-        Returns a Gaussian kernel of the specified size and standard deviation
+        Returns a (cached, read-only) Gaussian kernel of the specified size and standard deviation
         Args:
             sigma (float): The standard deviation of the Gaussian kernel
             kernel_size (int): The size of the Gaussian kernel
+            dtype (type): The data type of the kernel
         Returns:
             kernel (np.ndarray, 2D): The Gaussian kernel
         """
-        ax = np.arange(-kernel_size // 2 + 1.0, kernel_size // 2 + 1.0)
-        xx, yy = np.meshgrid(ax, ax)
-        kernel = np.exp(-(xx**2 + yy**2) / (2.0 * sigma**2))
-        kernel /= np.sum(kernel)
-        return kernel
+
+        def build() -> np.ndarray:
+            ax = np.arange(-kernel_size // 2 + 1.0, kernel_size // 2 + 1.0)
+            xx, yy = np.meshgrid(ax, ax)
+            kernel = np.exp(-(xx**2 + yy**2) / (2.0 * sigma**2))
+            kernel /= np.sum(kernel)
+            return kernel.astype(dtype, copy=False)
+
+        key = ("gaussian", kernel_size, sigma, np.dtype(dtype).str)
+        return KernelCacheUtil.Get(key, build)
+
+    @staticmethod
+    def GetBoxKernel(kernel_size: int = 5, dtype: type = np.float32) -> np.ndarray:
+        """
+        Returns a (cached, read-only) normalized box kernel of the specified size
+        Args:
+            kernel_size (int): The size of the box kernel
+            dtype (type): The data type of the kernel
+        Returns:
+            kernel (np.ndarray, 2D): The box kernel
+        """
+
+        def build() -> np.ndarray:
+            kernel = np.ones((kernel_size, kernel_size), dtype=dtype)
+            kernel /= np.sum(kernel)
+            return kernel
+
+        key = ("box", kernel_size, None, np.dtype(dtype).str)
+        return KernelCacheUtil.Get(key, build)
 
 
 class MorphKernelUtil(KernelUtil):
     @staticmethod
     def GetSquareKernel(size: int = 3) -> np.ndarray:
         """
-        Returns a square kernel of the specified size for morphological operations
+        Returns a (cached, read-only) square kernel of the specified size for morphological operations
         Args:
             size (int): The size of the square kernel
         Returns:
             kernel (np.ndarray, 2D): The square kernel
         """
-        return np.ones((size, size), dtype=np.uint8)
+        key = ("square", size, None, np.dtype(np.uint8).str)
+        return KernelCacheUtil.Get(key, lambda: np.ones((size, size), dtype=np.uint8))
 
     @staticmethod
     def GetCrossKernel(size: int = 3) -> np.ndarray:
         """
-        Returns a cross kernel of the specified size for morphological operations
+        Returns a (cached, read-only) cross kernel of the specified size for morphological operations
         Args:
             size (int): The size of the cross kernel
         Returns:
             kernel (np.ndarray, 2D): The cross kernel
         """
-        kernel = np.zeros((size, size), dtype=np.uint8)
-        center = size // 2
-        kernel[:, center] = 1
-        kernel[center, :] = 1
-        return kernel
+
+        def build() -> np.ndarray:
+            kernel = np.zeros((size, size), dtype=np.uint8)
+            center = size // 2
+            kernel[:, center] = 1
+            kernel[center, :] = 1
+            return kernel
+
+        key = ("cross", size, None, np.dtype(np.uint8).str)
+        return KernelCacheUtil.Get(key, build)
+
+    @staticmethod
+    def Decompose(kernel: np.ndarray) -> Tuple[Tuple[int, int, int, int], ...]:
+        """
+        Decomposes the structuring element of a kernel (its 1 entries) into solid rectangles
+        whose union is the element, e.g. one rectangle for a square or a line and one row plus
+        one column line for a cross. Every horizontal run of 1 entries is grown up and down as
+        far as the element allows, and rectangles contained in another one are dropped.
+        Args:
+            kernel (np.ndarray, 2D): The kernel
+        Returns:
+            rects (Tuple[Tuple[int, int, int, int], ...]): The (y, x, height, width) of every rectangle
+        """
+
+        def build(kernel: np.ndarray) -> Tuple[Tuple[int, int, int, int], ...]:
+            mask = kernel == 1
+            rects = set()
+            for y in range(mask.shape[0]):
+                edges = np.diff(np.concatenate(([0], mask[y].astype(np.int8), [0])))
+                for x0, x1 in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+                    top, bottom = y, y + 1
+                    while top > 0 and mask[top - 1, x0:x1].all():
+                        top -= 1
+                    while bottom < mask.shape[0] and mask[bottom, x0:x1].all():
+                        bottom += 1
+                    rects.add((top, int(x0), bottom - top, int(x1 - x0)))
+
+            def inside(a, b) -> bool:
+                return (
+                    a != b
+                    and b[0] <= a[0]
+                    and b[1] <= a[1]
+                    and a[0] + a[2] <= b[0] + b[2]
+                    and a[1] + a[3] <= b[1] + b[3]
+                )
+
+            return tuple(
+                sorted(r for r in rects if not any(inside(r, o) for o in rects))
+            )
+
+        return KernelCacheUtil.Derive("decompose", kernel, build)
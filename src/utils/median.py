@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Optional
+
+
+class MedianUtil:
+    # Kernel sizes cv2.medianBlur accepts for uint16 and float32 (uint8 takes any odd size)
+    CV_WIDE_KERNEL_SIZES = (3, 5)
+    # Upper bound on the number of window elements materialized at once
+    MAX_WINDOW_ELEMENTS = 1 << 24
+
+    @staticmethod
+    def Median(
+        image: np.ndarray, kernel_size: int = 3, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Applies a median filter to an image. Borders are filled by replicating the
+        edge pixels, so every output pixel (including the k//2 border) is defined.
+        uint8 images (and uint16 / float32 ones with k <= 5) go to cv2.medianBlur, whose
+        replicated border gives the same result. For large uint8 kernels it already runs a
+        constant-time histogram algorithm (Perreault & Hebert), the others use WindowMedian.
+        Args:
+            image (np.ndarray, 2D): The input image
+            kernel_size (int): The (odd) size of the square window
+            out (np.ndarray | None): Buffer to write the result into, must not overlap the image
+        Returns:
+            image (np.ndarray, 2D): The median filtered image, same dtype as the input
+        """
+        if kernel_size % 2 == 0:
+            raise ValueError("Kernel size must be odd")
+
+        if kernel_size == 1 or image.size == 0:
+            if out is None:
+                return image.copy()
+            np.copyto(out, image)
+            return out
+
+        if image.dtype == np.uint8 or (
+            image.dtype in (np.uint16, np.float32)
+            and kernel_size in MedianUtil.CV_WIDE_KERNEL_SIZES
+        ):
+            result = cv2.medianBlur(np.ascontiguousarray(image), kernel_size)
+            if out is None:
+                return result
+            np.copyto(out, result)
+            return out
+
+        return MedianUtil.WindowMedian(image, kernel_size, out)
+
+    @staticmethod
+    def WindowMedian(
+        image: np.ndarray, kernel_size: int = 3, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Vectorized median filter over strided window views, processed in row chunks
+        to bound memory. Works for any dtype, costs O(k^2) per pixel.
+        Args:
+            image (np.ndarray, 2D): The input image
+            kernel_size (int): The (odd) size of the square window
+            out (np.ndarray | None): Buffer to write the result into, must not overlap the image
+        Returns:
+            image (np.ndarray, 2D): The median filtered image, same dtype as the input
+        """
+        k = kernel_size
+        r = k // 2
+        h, w = image.shape
+        padded = np.pad(image, r, mode="edge")
+        windows = sliding_window_view(padded, (k, k))
+        output = np.empty_like(image) if out is None else out
+
+        rows = max(1, MedianUtil.MAX_WINDOW_ELEMENTS // (w * k * k))
+        mid = (k * k) // 2
+        for y in range(0, h, rows):
+            block = windows[y : y + rows].reshape(-1, w, k * k)
+            block = np.partition(block, mid, axis=-1)[..., mid]
+            output[y : y + rows] = block
+
+        return output
@@ -0,0 +1,97 @@
+import os
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class TilingUtil:
+    # Images with at least this many pixels are processed in tiles by default
+    MIN_PIXELS = 1 << 22
+    # Number of output rows computed per tile (excluding the halo rows)
+    TILE_ROWS = 256
+
+    _pool: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def ShouldTile(image: np.ndarray, tiled: Optional[bool] = None) -> bool:
+        """
+        Decides whether an image should be processed in tiles
+        Args:
+            image (np.ndarray, 2D): The input image
+            tiled (bool | None): Forces the decision, or None to decide from the image size
+        Returns:
+            tiled (bool): Whether to process the image in tiles
+        """
+        if tiled is not None:
+            return tiled
+        return image.ndim == 2 and image.size >= TilingUtil.MIN_PIXELS
+
+    @staticmethod
+    def Apply(
+        image: np.ndarray,
+        func: Callable[[np.ndarray], np.ndarray],
+        halo_top: int,
+        halo_bottom: int,
+        tile_rows: Optional[int] = None,
+        workers: Optional[int] = None,
+        dtype: Optional[np.dtype] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Applies a row-local operation to an image in horizontal strips on a thread pool.
+        Each strip is extended by halo rows taken from the image, so as long as the operation
+        only reads halo_top rows above and halo_bottom rows below each output row, the result is
+        identical to func(image). Strips touching the image edges are not extended past them,
+        so border handling is left to func exactly as for the whole image.
+        Args:
+            image (np.ndarray, 2D): The input image
+            func (Callable[[np.ndarray], np.ndarray]): The operation, mapping a strip to a same-shaped result
+            halo_top (int): Rows read above each output row
+            halo_bottom (int): Rows read below each output row
+            tile_rows (int | None): Output rows per strip. Defaults to TILE_ROWS.
+            workers (int | None): Number of threads, 1 to run inline. Defaults to the shared pool.
+            dtype (np.dtype | None): The data type of the result. Defaults to the image data type.
+            out (np.ndarray | None): Buffer to write the result into, must not overlap the image
+        Returns:
+            image (np.ndarray, 2D): The result, written strip by strip into one preallocated array
+        """
+        h = image.shape[0]
+        tile_rows = tile_rows or TilingUtil.TILE_ROWS
+        starts = range(0, h, tile_rows)
+        if out is not None and out.shape != image.shape:
+            raise ValueError(
+                f"Output buffer shape {out.shape} does not match the image shape {image.shape}"
+            )
+        output = out if out is not None else np.empty(image.shape, dtype=dtype or image.dtype)
+
+        def run(y0: int) -> None:
+            y1 = min(y0 + tile_rows, h)
+            top, bottom = max(0, y0 - halo_top), min(h, y1 + halo_bottom)
+            output[y0:y1] = func(image[top:bottom])[y0 - top : y1 - top]
+
+        if workers == 1 or len(starts) == 1:
+            for y0 in starts:
+                run(y0)
+        else:
+            pool = (
+                ThreadPoolExecutor(max_workers=workers)
+                if workers is not None
+                else TilingUtil._SharedPool()
+            )
+            try:
+                for future in [pool.submit(run, y0) for y0 in starts]:
+                    future.result()
+            finally:
+                if workers is not None:
+                    pool.shutdown()
+
+        return output
+
+    @staticmethod
+    def _SharedPool() -> ThreadPoolExecutor:
+        with TilingUtil._lock:
+            if TilingUtil._pool is None:
+                TilingUtil._pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+            return TilingUtil._pool
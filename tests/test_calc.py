@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from src.utils.calc import CalcUtil
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.int16, np.uint16, np.float32, np.float64])
+@pytest.mark.parametrize("shape", [(5, 5), (7, 7), (7, 8), (9, 9), (11, 11)])
+def test_tiled_correlation_matches_untiled(dtype, shape):
+    rng = np.random.default_rng(0)
+    image = (rng.random((1500, 1300)) * 200).astype(dtype)
+    kernel = rng.random(shape).astype(np.float32)
+    kernel /= kernel.sum()
+
+    tiled = CalcUtil.Correlate(image, kernel, tiled=True, workers=4)
+    untiled = CalcUtil.Correlate(image, kernel, tiled=False)
+
+    assert tiled.dtype == untiled.dtype
+    assert np.array_equal(tiled, untiled)
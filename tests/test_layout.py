@@ -0,0 +1,38 @@
+import cv2
+import numpy as np
+
+from src.image_processor.segmentation import LayoutAnalyzer
+
+
+def render_page():
+    page = np.zeros((300, 600), dtype=np.uint8)
+    for i, text in enumerate(["hello world", "layout lines", "third line"]):
+        cv2.putText(page, text, (20, 80 + i * 80), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 255, 3)
+    return (page > 127).astype(np.uint8) * 255
+
+
+def test_distant_specks_do_not_stretch_lines():
+    page = render_page()
+    clean = LayoutAnalyzer().Analyze(page)
+
+    noisy = page.copy()
+    first, last = clean.lines[0], clean.lines[-1]
+    noisy[first.y - 40 : first.y - 38, 300:302] = 255  # speck above the first line
+    noisy[last.y + last.h + 40 : last.y + last.h + 42, 300:302] = 255  # and below the last
+    layout = LayoutAnalyzer().Analyze(noisy)
+
+    assert [line.box for line in layout.lines] == [line.box for line in clean.lines]
+    assert [word.box for word in layout.words] == [word.box for word in clean.words]
+
+
+def test_marks_near_a_line_are_attached():
+    page = render_page()
+    clean = LayoutAnalyzer().Analyze(page)
+    line = clean.lines[1]
+
+    marked = page.copy()
+    marked[line.y - 3 : line.y - 1, 300:302] = 255  # just above the line, like an accent
+    layout = LayoutAnalyzer().Analyze(marked)
+
+    assert layout.lines[1].y < line.y
+    assert len(layout.lines) == len(clean.lines)